@@ -7,7 +7,7 @@ from numpy import polyfit
 
 from averaging import simpleAvg
 from calibration import voltToTemp, findLinParams
-from peakdetect import simplePeakDetect
+from peakdetect import peakDetect
 import math as math
 
 filePath =  "Raw Data/chopperSquare.csv"
@@ -27,7 +27,7 @@ for data in v:
 m,c = findLinParams(folderStr="Raw Data/Measurements26Feb/",lowestTemp=700, highestTemp=1300,celsius=True,samples=500, increment=100)
 temp = voltToTemp(lifted,m,c+1.38, True)
 
-y = simplePeakDetect(t,temp,0.05)
+y = peakDetect(t,temp,0.05)
 fig = plt.figure(figsize=(9,6))
 ax = fig.add_subplot(1, 1, 1)
 title("Peak Detection of Chopper Wheel Measurement at 1000°C")
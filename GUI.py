@@ -3,7 +3,8 @@ from tkinter import filedialog, messagebox, Toplevel
 import pandas as pd
 import os
 from matplotlib import pyplot as plt
-from calibration import findLinParams, voltToTemp, emisComp
+from calibration import findLinParams, voltToTempArr, emisCompArr
+from captureio import readCapture
 
 # UI Configuration Variables
 WINDOW_WIDTH = 500
@@ -26,12 +27,9 @@ def dummy_calibration_function(folder, t_min, t_max, t_step, n_samples, temp_uni
 def process_data(raw_file, calibration_folder, use_manual_calibration, gradient, y_intercept,
                  emissivity, apply_peak_detection, time_constant, apply_averaging, num_samples, temp_units):
     is_celsius = (temp_units == "C")
-    raw_data = pd.read_csv(raw_file)
-    voltages = raw_data.iloc[:, 1]
-    voltages = emisComp(vArr=voltages, emis=emissivity)
-    raw_data['Time'] = pd.to_datetime(raw_data.iloc[:, 0], format="mixed")
-    time = (raw_data['Time'] - raw_data['Time'].iloc[0]).dt.total_seconds()
-    temperature = voltToTemp(celsius=is_celsius, m=gradient, c=y_intercept, vArr=voltages)
+    time, voltages = readCapture(raw_file)
+    voltages = emisCompArr(vArr=voltages, emis=emissivity)
+    temperature = voltToTempArr(celsius=is_celsius, m=gradient, c=y_intercept, vArr=voltages)
 
     plt.figure(figsize=(8, 5))
     plt.plot(time, temperature)
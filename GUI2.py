@@ -3,20 +3,28 @@ import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QRadioButton, QButtonGroup,
                              QCheckBox, QFileDialog, QMessageBox, QGroupBox, QDialog,
-                             QFormLayout, QDialogButtonBox, QListWidget, QListWidgetItem, QToolBar, QAction)
-from PyQt5.QtCore import Qt
+                             QFormLayout, QDialogButtonBox, QListWidget, QListWidgetItem, QToolBar, QAction,
+                             QProgressDialog, QComboBox)
+from PyQt5.QtCore import Qt, QTimer
+import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
-from averaging import simpleAvg
-from calibration import findLinParams, voltToTemp, emisComp
-from peakdetect import simplePeakDetect
+from averaging import multiAvg
+from calibration import findLinParams, bootstrapLinParams, voltToTempArr, emisCompArr
+from peakdetect import peakDetect
+from captureio import CAPTURE_EXTENSION, CaptureChannel, SampleClock, readCapture, readCaptureHeader
+from decimate import DecimatedPlot
+from pipeline import StageCache, process, processFile, stageKeys
+from profiling import profiler
 import matplotlib.colors as mcolors
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QSpinBox, QInputDialog
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 
 
@@ -30,6 +38,7 @@ class PlotWindow(QMainWindow):
         self.canvas = FigureCanvas(self.figure)
         self.axes = self.figure.add_subplot(111)
         self.axes.grid(True)
+        self.decimated = DecimatedPlot(self.axes)  # Plots a min/max reduction at the axes pixel width
 
         self.setCentralWidget(self.canvas)
 
@@ -57,7 +66,10 @@ class PlotWindow(QMainWindow):
             self.canvas.draw()
 
     def update_plot(self, datasets, units='C'):
+        """Plot (time, temperature in K, label) series in the given units"""
+        self.decimated.disconnect()
         self.axes.clear()
+        self.decimated = DecimatedPlot(self.axes, yOffset=-273.15 if units == 'C' else 0.0)
         colors = list(mcolors.TABLEAU_COLORS.values())
 
         # Clear previous legend if exists
@@ -67,11 +79,12 @@ class PlotWindow(QMainWindow):
         # Plot in exact received order
         lines = []
         labels = []
-        for i, (time, temp, label) in enumerate(datasets):
-            color = colors[i % len(colors)]
-            line = self.axes.plot(time, temp, '-', color=color, zorder=len(datasets) - i)
-            lines.append(line[0])
-            labels.append(label)
+        with profiler.stage('plot', sum(len(temp) for _, temp, _ in datasets)):
+            for i, (time, temp, label) in enumerate(datasets):
+                color = colors[i % len(colors)]
+                line = self.decimated.plot(time, temp, '-', color=color, zorder=len(datasets) - i)
+                lines.append(line)
+                labels.append(label)
 
         # Set up plot labels and formatting
         self.axes.set_xlabel('Time (s)')
@@ -162,6 +175,11 @@ class CalibrationDialog(QDialog):
         self.samples_edit.setPlaceholderText("Number of samples per file")
         form_layout.addRow("Samples per File:", self.samples_edit)
 
+        # Uncertainty of the fit from resampling the raw samples
+        self.bootstrap_check = QCheckBox("Bootstrap confidence intervals (95%)")
+        self.bootstrap_check.setChecked(True)
+        form_layout.addRow(self.bootstrap_check)
+
         params_group.setLayout(form_layout)
         layout.addWidget(params_group)
 
@@ -199,6 +217,7 @@ class CalibrationDialog(QDialog):
             if self.samples <= 0:
                 raise ValueError("Number of samples must be positive")
 
+            self.bootstrap = self.bootstrap_check.isChecked()
             self.accept()
 
         except ValueError as e:
@@ -231,12 +250,24 @@ class TemperatureProcessor(QMainWindow):
 
         # Data variables - now stores multiple datasets
         self.current_file = None
+        self.time_data = None
+        self.voltage_data = None
         self.calibration_params = {'gradient': None, 'y_intercept': None}
         self.units = 'C'  # Default to Celsius
 
         # Plot window
         self.plot_window = PlotWindow(self)
 
+        # Background processing, one file per worker process
+        self.executor = None  # Started on the first run that needs it
+        self.pending = {}  # future -> (file_path, dataset, params)
+        self.batch_errors = []
+        self.batch_total = 0
+        self.progress = None
+        self.batch_timer = QTimer(self)
+        self.batch_timer.setInterval(50)
+        self.batch_timer.timeout.connect(self.poll_batch)
+
 
 
         # UI Setup
@@ -376,6 +407,31 @@ class TemperatureProcessor(QMainWindow):
         self.samples_edit.setEnabled(False)
         options_layout.addWidget(self.samples_edit)
 
+        # Precision of the loaded voltages and every processing stage
+        precision_layout = QHBoxLayout()
+        precision_layout.addWidget(QLabel("Precision:"))
+        self.precision_combo = QComboBox()
+        self.precision_combo.addItems(["float64", "float32"])
+        self.precision_combo.setToolTip("float32 halves the memory of every file, within 0.01 °C of float64")
+        self.precision_combo.currentTextChanged.connect(self.change_precision)
+        precision_layout.addWidget(self.precision_combo)
+        options_layout.addLayout(precision_layout)
+
+        # Stage timings, shown in the status bar
+        profile_layout = QHBoxLayout()
+        self.profile_check = QCheckBox("Record Stage Timings")
+        self.profile_check.stateChanged.connect(self.toggle_profiling)
+        profile_layout.addWidget(self.profile_check)
+
+        self.trace_check = QCheckBox("cProfile + Memory Next Run")
+        self.trace_check.setToolTip("Runs the next processing in this window under cProfile and tracemalloc")
+        profile_layout.addWidget(self.trace_check)
+
+        save_timings_button = QPushButton("Save Timings")
+        save_timings_button.clicked.connect(self.save_timings)
+        profile_layout.addWidget(save_timings_button)
+        options_layout.addLayout(profile_layout)
+
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
 
@@ -420,14 +476,17 @@ class TemperatureProcessor(QMainWindow):
 
 
     def browse_files(self):
-        """Browse and add multiple CSV files"""
+        """Browse and add multiple CSV files or binary captures"""
         file_paths, _ = QFileDialog.getOpenFileNames(
-            self, "Open CSV Files", os.path.dirname(os.path.realpath(__file__)),
-            "CSV Files (*.csv)"
+            self, "Open Captures", os.path.dirname(os.path.realpath(__file__)),
+            f"Captures (*.csv *{CAPTURE_EXTENSION});;CSV Files (*.csv);;Binary Captures (*{CAPTURE_EXTENSION})"
         )
         if file_paths:
+            if profiler.enabled:
+                profiler.reset()
             for file_path in file_paths:
                 self.add_file(file_path)
+            self.show_timings()
 
     def add_file(self, file_path):
         """Add file while maintaining order"""
@@ -436,32 +495,62 @@ class TemperatureProcessor(QMainWindow):
             return
 
         try:
-            raw_data = pd.read_csv(file_path)
-            basename = os.path.basename(file_path)
-
-            # Convert time to seconds
-            raw_data['Time'] = pd.to_datetime(raw_data.iloc[:, 0], format="mixed")
-            time_data = (raw_data['Time'] - raw_data['Time'].iloc[0]).dt.total_seconds().values
-
-            # Add to both OrderedDict and file_order
-            self.datasets[file_path] = {
-                'raw_data': raw_data,
-                'time': time_data,
-                'temperature': None,
-                'original_basename': basename,
-                'basename': basename,
-                'display_name': basename,
-                'emissivity': 1.0
-            }
-            self.file_order.append(file_path)
-
-            # Add to list widget
-            item = QListWidgetItem(f"{basename} (ε=1.00)")
-            item.setData(Qt.UserRole, file_path)
-            self.file_list.addItem(item)
+            if os.path.splitext(file_path)[1].lower() == CAPTURE_EXTENSION:
+                channels = self.capture_channels(file_path)
+            else:
+                # Stream the file in chunks, only the time (s) and voltage arrays are kept
+                time_data, voltages = readCapture(file_path, dtype=self.precision_combo.currentText())
+                channels = [(file_path, os.path.basename(file_path), time_data, voltages, 1.0, None)]
+
+            for key, basename, time_data, voltages, emissivity, calibration in channels:
+                # Add to both OrderedDict and file_order
+                self.datasets[key] = {
+                    'voltage': voltages,
+                    'time': time_data,
+                    'temperature': None,
+                    'original_basename': basename,
+                    'basename': basename,
+                    'display_name': basename,
+                    'emissivity': emissivity,
+                    'calibration': calibration,  # (gradient, intercept) recorded with the channel, None = the one set here
+                    'stage_cache': StageCache()  # Results of each processing stage, reused until their inputs change
+                }
+                self.file_order.append(key)
+
+                # Add to list widget
+                item = QListWidgetItem(f"{basename} (ε={emissivity:.2f})")
+                item.setData(Qt.UserRole, key)
+                self.file_list.addItem(item)
 
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load CSV file {file_path}:\n{str(e)}")
+            QMessageBox.critical(self, "Error", f"Failed to load file {file_path}:\n{str(e)}")
+
+    def capture_channels(self, file_path):
+        """One dataset per channel of a binary capture, mapped from the file instead of read into memory.
+        Each channel keeps the emissivity and calibration it was recorded with."""
+        header = readCaptureHeader(file_path)
+        time_data = SampleClock(header['samples'], header['sampleRate'])  # Times made only for the range used
+        basename = os.path.basename(file_path)
+        single = header['channels'] == 1
+        channels = []
+        for i, name in enumerate(header['names']):
+            gradient, intercept, emissivity = header['calibration'][i]
+            channels.append((file_path if single else f"{file_path} [{name}]",
+                             basename if single else f"{basename} [{name}]",
+                             time_data,
+                             CaptureChannel(file_path, i, header['samples']),
+                             emissivity if np.isfinite(emissivity) else 1.0,
+                             (gradient, intercept) if np.isfinite(gradient) and np.isfinite(intercept) else None))
+        if any(key in self.datasets for key, *rest in channels):
+            raise ValueError("Capture already loaded")
+
+        # With none set here yet, the first recorded calibration becomes the one for other files
+        recorded = next((channel[5] for channel in channels if channel[5] is not None), None)
+        if self.calibration_params['gradient'] is None and recorded is not None:
+            self.calibration_params = {'gradient': recorded[0], 'y_intercept': recorded[1]}
+            self.gradient_edit.setText(str(recorded[0]))
+            self.yint_edit.setText(str(recorded[1]))
+        return channels
 
     def remove_selected_file(self):
         """Remove selected file from dataset"""
@@ -587,51 +676,186 @@ class TemperatureProcessor(QMainWindow):
                 QMessageBox.warning(self, "Warning", "Invalid calibration parameters!")
                 return
 
+        try:
+            params = self.processing_params()
+        except ValueError:
+            QMessageBox.warning(self, "Warning", "Invalid time constant or number of samples!")
+            return
+
+        # A new run replaces one still going, its files are resubmitted below
+        self.cancel_batch()
+
+        if profiler.enabled or self.trace_check.isChecked():
+            profiler.reset()
+        if self.trace_check.isChecked():
+            # One run in this process, so cProfile and tracemalloc see all of the work
+            self.trace_check.setChecked(False)
+            with profiler.trace(cprofile=True, memory=True):
+                for file_path, data in self.datasets.items():
+                    self.process_single_file(file_path, data, params)
+                self.update_plot()
+            self.show_timings()
+            return
+
+        # Files with nothing stale are finished here, the rest go to the worker processes
         for file_path, data in self.datasets.items():
-            self.process_single_file(file_path, data)
+            file_params = self.dataset_params(params, data)
+            keys = stageKeys(len(data['time']), file_params)
+            stale = data['stage_cache'].stale(keys)
+            if not stale or stale == ['slice']:
+                self.process_single_file(file_path, data, params)
+                continue
+            # The voltages are only sent if the conversion has to be redone
+            voltage = data['voltage'] if stale[0] == 'temperature' else None
+            job = (processFile, data['time'], voltage, file_params, data['stage_cache'].seed(keys), profiler.enabled)
+            try:
+                future = self.worker_pool().submit(*job)
+            except BrokenProcessPool:
+                self.executor = None  # A worker died in an earlier run
+                future = self.worker_pool().submit(*job)
+            self.pending[future] = (file_path, data, params)
 
-        self.update_plot()
+        if not self.pending:
+            self.update_plot()
+            self.show_timings()
+            return
 
-    def process_single_file(self, file_path, data):
-        """Process temperature data for a single file with sample range"""
-        try:
-            emissivity = data['emissivity']
-            voltages = emisComp(vArr=data['raw_data'].iloc[:, 1].values, emis=emissivity)
+        self.batch_errors = []
+        self.batch_total = len(self.pending)
+        self.progress = QProgressDialog("Processing files...", "Cancel", 0, self.batch_total, self)
+        self.progress.setWindowTitle("Processing")
+        self.progress.setWindowModality(Qt.WindowModal)
+        self.progress.setMinimumDuration(0)
+        self.progress.canceled.connect(self.cancel_batch)
+        self.progress.setValue(0)
+        self.batch_timer.start()
+
+    def worker_pool(self):
+        """Process pool for the per-file pipeline, started on first use"""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return self.executor
+
+    def poll_batch(self):
+        """Collect the files the worker processes have finished"""
+        done = [future for future in self.pending if future.done()]
+        for future in done:
+            file_path, data, params = self.pending.pop(future)
+            if self.datasets.get(file_path) is not data:
+                continue  # Removed while it was being processed
+            try:
+                entries, timings = future.result()
+                data['stage_cache'].update(entries)
+                if timings:
+                    profiler.merge(timings)  # Stage timings from the worker
+                self.process_single_file(file_path, data, params)  # Only picks up the cached results
+            except BrokenProcessPool:
+                self.executor = None  # A worker died, start a new pool next time
+                self.batch_errors.append(f"{data['basename']}: worker process terminated")
+            except Exception as e:
+                self.batch_errors.append(f"{data['basename']}: {str(e)}")
 
-            # Always calculate in Celsius first
-            temp_data = voltToTemp(
-                celsius=True,
-                m=self.calibration_params['gradient'],
-                c=self.calibration_params['y_intercept'],
-                vArr=voltages
-            )
+        if done:
+            if self.progress is not None:
+                self.progress.setValue(self.batch_total - len(self.pending))
+            # Show each file as it arrives when the plot is already open
+            if self.plot_window.isVisible() and any(d['temperature'] is not None for d in self.datasets.values()):
+                self.update_plot()
 
-            # Get time and temperature data
-            time_data = data['time']
+        if not self.pending:
+            self.finish_batch()
 
-            # Apply sample range if specified
-            start_idx = self.start_sample.value()
-            end_idx = self.end_sample.value()
+    def cancel_batch(self):
+        """Stop a running batch, files already finished keep their results"""
+        if not self.pending:
+            return
+        for future in self.pending:
+            future.cancel()  # Files a worker has already started are finished there and ignored
+        self.pending.clear()
+        self.finish_batch()
+
+    def finish_batch(self):
+        self.batch_timer.stop()
+        if self.progress is not None:
+            self.progress.canceled.disconnect(self.cancel_batch)
+            self.progress.close()
+            self.progress = None
+        if self.batch_errors:
+            QMessageBox.warning(self, "Warning", "Error processing files:\n" + "\n".join(self.batch_errors))
+            self.batch_errors = []
+        if any(data['temperature'] is not None for data in self.datasets.values()):
+            self.update_plot()
+        self.show_timings()
+
+    def toggle_profiling(self, state):
+        profiler.enabled = state == Qt.Checked
+        if not profiler.enabled:
+            self.statusBar().clearMessage()
+
+    def show_timings(self):
+        """Show the recorded stage timings in the status bar"""
+        if profiler.records():
+            self.statusBar().showMessage(profiler.summary())
+
+    def save_timings(self):
+        """Save the recorded stage timings (and cProfile/memory results if traced) to JSON"""
+        if not profiler.records():
+            QMessageBox.warning(self, "Warning", "No timings recorded, enable Record Stage Timings and process first")
+            return
 
-            # Ensure valid range
-            if end_idx > len(time_data):
-                end_idx = len(time_data)
-            if start_idx >= end_idx:
-                start_idx = 0
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Timings", "", "JSON Files (*.json)")
+        if file_path:
+            try:
+                profiler.dump(file_path)
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to save timings:\n{str(e)}")
+
+    def processing_params(self):
+        """Processing parameters shared by every file"""
+        return {
+            'gradient': self.calibration_params['gradient'],
+            'intercept': self.calibration_params['y_intercept'],
+            'start': self.start_sample.value(),
+            'end': self.end_sample.value(),
+            'timeConstant': float(self.time_const_edit.text()) if self.peak_detect_check.isChecked() else None,
+            'samples': int(self.samples_edit.text()) if self.averaging_check.isChecked() else None,
+            'dtype': self.precision_combo.currentText()
+        }
+
+    def change_precision(self, dtype):
+        """Store the loaded voltages at the new precision, results follow on the next processing"""
+        self.cancel_batch()
+        dtype = np.dtype(dtype)
+        for file_path, data in self.datasets.items():
+            voltage = data['voltage']
+            if not isinstance(voltage, np.ndarray) or voltage.dtype == dtype:
+                continue  # Binary captures stay mapped at their recorded dtype
+            if dtype.itemsize <= voltage.dtype.itemsize:
+                data['voltage'] = voltage.astype(dtype)
+                continue
+            # Widening float32 voltages wouldn't bring back the digits they lost, the file is read again
+            try:
+                data['voltage'] = readCapture(file_path, dtype=dtype)[1]
+            except Exception as e:
+                QMessageBox.warning(self, "Warning", f"Couldn't reload {data['basename']} at {dtype.name}, "
+                                                     f"keeping its {voltage.dtype.name} voltages:\n{str(e)}")
 
-            time_data = time_data[start_idx:end_idx]
-            temp_data = temp_data[start_idx:end_idx]
+    def dataset_params(self, params, data):
+        """Processing parameters with the dataset's own emissivity, and its recorded calibration if it has one"""
+        params = dict(params, emissivity=data['emissivity'])
+        if data['calibration'] is not None:
+            params.update(gradient=data['calibration'][0], intercept=data['calibration'][1])
+        return params
 
-            # Convert to Kelvin if needed
-            if self.units == 'K':
-                temp_data = [t + 273.15 for t in temp_data]
+    def process_single_file(self, file_path, data, params=None):
+        """Process temperature data for a single file with sample range"""
+        try:
+            params = self.dataset_params(params or self.processing_params(), data)
 
-            if self.peak_detect_check.isChecked():
-                temp_data = simplePeakDetect(time_data, temp_data, int(self.time_const_edit.text()))
-            if self.averaging_check.isChecked():
-                temp_data = simpleAvg(temp_data, int(self.samples_edit.text()))
+            # Only the stages whose inputs changed since the last run are recomputed
+            time_data, temp_data = process(data['time'], data['voltage'], params, data['stage_cache'])
 
-            # Store the processed data
+            # Store the processed data, always in Kelvin
             data['temperature'] = temp_data
             data['time_processed'] = time_data  # Store the processed time range
 
@@ -639,14 +863,17 @@ class TemperatureProcessor(QMainWindow):
             QMessageBox.warning(self, "Warning",
                                 f"Error processing file {data['basename']}:\n{str(e)}")
 
+    def closeEvent(self, event):
+        """Stop the worker processes with the window"""
+        self.cancel_batch()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        super().closeEvent(event)
+
     def load_csv_data(self, file_path):
         try:
-            self.raw_data = pd.read_csv(file_path)
-            voltages = self.raw_data.iloc[:, 1].values
-
-            # Convert time to seconds
-            self.raw_data['Time'] = pd.to_datetime(self.raw_data.iloc[:, 0], format="mixed")
-            self.time_data = (self.raw_data['Time'] - self.raw_data['Time'].iloc[0]).dt.total_seconds().values
+            self.time_data, self.voltage_data = readCapture(file_path)
 
             # Convert to temperature if we have calibration
             if self.calibration_params['gradient'] is not None:
@@ -713,23 +940,23 @@ class TemperatureProcessor(QMainWindow):
                 QMessageBox.critical(self, "Error", f"Failed to load calibration:\n{str(e)}")
 
     def update_temperature(self):
-        if self.raw_data is None:
+        if self.voltage_data is None:
             return
 
         try:
             emissivity = float(self.emissivity_edit.text())
-            voltages = emisComp(vArr=self.raw_data.iloc[:, 1].values, emis=emissivity)
+            voltages = emisCompArr(vArr=self.voltage_data, emis=emissivity)
 
-            self.temperature_data = voltToTemp(
-                celsius=(self.units == 'C'),
+            self.temperature_data = voltToTempArr(
+                celsius=False,  # Kelvin, converted for display when plotted
                 m=self.calibration_params['gradient'],
                 c=self.calibration_params['y_intercept'],
                 vArr=voltages
             )
             if self.peak_detect_check.isChecked():
-                self.temperature_data = simplePeakDetect(self.time_data,self.temperature_data,int(self.time_const_edit.text()))
+                self.temperature_data = peakDetect(self.time_data,self.temperature_data,float(self.time_const_edit.text()))
             if self.averaging_check.isChecked():
-                self.temperature_data = simpleAvg(self.temperature_data, int(self.samples_edit.text()))
+                self.temperature_data = multiAvg(self.temperature_data, [int(self.samples_edit.text())])[0]
 
             self.plot_window.update_plot(self.time_data, self.temperature_data, self.units)
 
@@ -772,40 +999,15 @@ class TemperatureProcessor(QMainWindow):
                 self.update_plot()
 
     def change_units(self):
-        """Handle unit conversion between Celsius and Kelvin"""
+        """Switch the displayed units, the processed data stays in Kelvin"""
         new_units = 'C' if self.celsius_radio.isChecked() else 'K'
 
-        # Only convert if units actually changed
         if new_units != self.units:
             self.units = new_units
 
-            # Convert existing temperatures if we have data
-            if hasattr(self, 'datasets') and self.datasets:
-                try:
-                    if new_units == 'K':
-                        # Convert from C to K
-                        for file_data in self.datasets.values():
-                            if file_data['temperature'] is not None:
-                                file_data['temperature'] = [t + 273.15 for t in file_data['temperature']]
-                    else:
-                        # Convert from K to C
-                        for file_data in self.datasets.values():
-                            if file_data['temperature'] is not None:
-                                file_data['temperature'] = [t - 273.15 for t in file_data['temperature']]
-
-                    # Update plot if we have processed data
-                    if any(data['temperature'] is not None for data in self.datasets.values()):
-                        self.update_plot()
-
-                except Exception as e:
-                    QMessageBox.critical(self, "Conversion Error",
-                                         f"Failed to convert temperatures:\n{str(e)}")
-                    # Revert the radio buttons if conversion fails
-                    if new_units == 'K':
-                        self.celsius_radio.setChecked(True)
-                    else:
-                        self.kelvin_radio.setChecked(True)
-                    self.units = 'C' if self.celsius_radio.isChecked() else 'K'
+            # Only the plot changes, the offset is applied to the points drawn
+            if any(data['temperature'] is not None for data in self.datasets.values()):
+                self.update_plot()
 
     def toggle_peak_detection(self, state):
         self.time_const_edit.setEnabled(state == Qt.Checked)
@@ -831,6 +1033,26 @@ class TemperatureProcessor(QMainWindow):
                 self.gradient_edit.setText(f"{grad:.4f}")
                 self.yint_edit.setText(f"{yint:.4f}")
 
+                if dialog.bootstrap:
+                    fit = bootstrapLinParams(
+                        folderStr=dialog.folder_path,
+                        samples=dialog.samples,
+                        lowestTemp=dialog.min_temp,
+                        highestTemp=dialog.max_temp,
+                        increment=dialog.step_temp,
+                        celsius=True
+                    )
+                    QMessageBox.information(
+                        self, "Calibration Uncertainty",
+                        f"Gradient: {fit['m']:.4f} ± {fit['m_std']:.4f}  "
+                        f"[{fit['m_interval'][0]:.4f}, {fit['m_interval'][1]:.4f}]\n"
+                        f"Y-Intercept: {fit['c']:.4f} ± {fit['c_std']:.4f}  "
+                        f"[{fit['c_interval'][0]:.4f}, {fit['c_interval'][1]:.4f}]\n"
+                        f"Mean Eff. Wavelength: {fit['wavelength'] * 1e9:.2f} nm  "
+                        f"[{fit['wavelength_interval'][0] * 1e9:.2f}, {fit['wavelength_interval'][1] * 1e9:.2f}] nm\n"
+                        f"{fit['confidence']:.0%} intervals from {fit['replicates']} bootstrap replicates"
+                    )
+
                 if hasattr(self, 'datasets') and self.datasets:
                     self.process_all_data()
 
@@ -838,7 +1060,7 @@ class TemperatureProcessor(QMainWindow):
                 QMessageBox.critical(self, "Calibration Error", f"Failed to calibrate:\n{str(e)}")
 
     def process_data(self):
-        if self.raw_data is None:
+        if self.voltage_data is None:
             QMessageBox.warning(self, "Warning", "No CSV file loaded!")
             return
 
@@ -3,13 +3,17 @@ from tkinter import ttk, filedialog, messagebox
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.animation import FuncAnimation
-import nidaqmx
-from nidaqmx.constants import TerminalConfiguration, AcquisitionType
-from calibration import findLinParams, voltToTemp, emisComp
+from calibration import findLinParams, voltToTempArr, emisCompArr
+from acquisition import AcquisitionThread
+from captureio import CAPTURE_EXTENSION
+from daqbackend import BACKENDS, createBackend, nidaqmx
+from ringbuffer import RingBuffer
+from decimate import minMaxDecimate
+from liveplot import LivePlot
+from profiling import profiler
+from recorder import CaptureRecorder
 import pandas as pd
 import os
-from collections import deque
 
 
 class LiveTemperatureMonitor:
@@ -19,28 +23,40 @@ class LiveTemperatureMonitor:
         self.root.geometry("1000x800")
 
         # DAQ Configuration
-        self.task = None
+        self.backend = None
         self.sample_rate = 1000  # Hz
         self.samples_per_chunk = 100
-        self.max_data_points = 5000  # Points to show in plot
+        self.max_data_points = 5000  # Points kept for the plot and Save Data, can be millions
+        self.ring_seconds = 10  # Seconds of raw samples the acquisition ring buffer holds
+        self.dtype = np.dtype(np.float64)  # Of the voltage and temperature buffers, the DAQ always reads float64
         self.running = False
 
-        # Data buffers
-        self.time_buffer = deque(maxlen=self.max_data_points)
-        self.voltage_buffer = deque(maxlen=self.max_data_points)
-        self.temp_buffer = deque(maxlen=self.max_data_points)
-
-        # Calibration parameters
-        self.gradient = 1.0
-        self.y_intercept = 0.0
-        self.emissivity = 1.0
+        # Acquisition thread and the ring buffer it fills
+        self.acquisition = None
+        self.ring = None
+        self.read_pos = 0  # Index of the next sample to take from the ring
+        self.samples_lost = 0
+        self.recorder = None  # Writes every acquired sample to disk on its own thread while recording
+
+        # Calibration parameters, one row per channel as typed in the channel table
+        self.channels = [{'channel': "ai0", 'gradient': "1.0", 'y_intercept': "0.0", 'emissivity': "1.0"}]
+        self.gradient = np.ones((1, 1))  # (channels, 1) so they broadcast over a (channels, samples) block
+        self.y_intercept = np.zeros((1, 1))
+        self.emissivity = np.ones((1, 1))
         self.temp_units = "C"  # C or K
+        self.selected_channel = 0
+        self.loading_channel = False  # Set while the fields are filled from the table
+        self.acquired_channels = ["ai0"]  # Channels the buffers hold, for Save Data
+
+        # Data buffers
+        self.allocate_buffers()
 
         # UI Setup
         self.setup_ui()
 
-        # Animation
-        self.ani = None
+        # Render loop
+        self.render_job = None
+        self.render_interval = 50  # ms between frames
 
     def setup_ui(self):
         """Configure the user interface"""
@@ -51,14 +67,12 @@ class LiveTemperatureMonitor:
         plot_frame = ttk.Frame(main_frame)
         plot_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        self.fig, self.ax = plt.subplots(figsize=(10, 5))
-        self.line, = self.ax.plot([], [], 'r-')
-        self.ax.set_xlabel('Time (s)')
-        self.ax.set_ylabel(f'Temperature (°{self.temp_units})')
-        self.ax.grid(True)
-
+        self.fig = plt.figure(figsize=(10, 5))
         self.canvas = FigureCanvasTkAgg(self.fig, master=plot_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.live_plot = None
+        self.layout_var = tk.StringVar(value="overlaid")
+        self.setup_plot()
 
         # Control Frame
         control_frame = ttk.Frame(main_frame)
@@ -67,13 +81,26 @@ class LiveTemperatureMonitor:
         # DAQ Settings
         ttk.Label(control_frame, text="DAQ Settings:").grid(row=0, column=0, sticky='w')
 
+        # Real NI device, or a simulated one when running without hardware
+        ttk.Label(control_frame, text="Source:").grid(row=0, column=2)
+        self.backend_var = tk.StringVar(value="NI-DAQmx" if nidaqmx is not None else "Simulated plateau")
+        self.backend_combo = ttk.Combobox(control_frame, textvariable=self.backend_var,
+                                          values=list(BACKENDS), state="readonly", width=18)
+        self.backend_combo.grid(row=0, column=3, columnspan=2, sticky='w')
+
+        # float32 halves the plot/export buffers, within 0.01 °C of float64
+        ttk.Label(control_frame, text="Precision:").grid(row=0, column=5)
+        self.precision_var = tk.StringVar(value=self.dtype.name)
+        ttk.Combobox(control_frame, textvariable=self.precision_var, values=["float64", "float32"],
+                     state="readonly", width=8).grid(row=0, column=6, sticky='w')
+
         ttk.Label(control_frame, text="Device:").grid(row=1, column=0)
         self.device_var = tk.StringVar(value="Dev1")
         self.device_entry = ttk.Entry(control_frame, textvariable=self.device_var, width=10)
         self.device_entry.grid(row=1, column=1)
 
         ttk.Label(control_frame, text="Channel:").grid(row=1, column=2)
-        self.channel_var = tk.StringVar(value="ai0")
+        self.channel_var = tk.StringVar(value=self.channels[0]['channel'])
         self.channel_entry = ttk.Entry(control_frame, textvariable=self.channel_var, width=10)
         self.channel_entry.grid(row=1, column=3)
 
@@ -82,21 +109,26 @@ class LiveTemperatureMonitor:
         self.sample_rate_entry = ttk.Entry(control_frame, textvariable=self.sample_rate_var, width=10)
         self.sample_rate_entry.grid(row=1, column=5)
 
+        ttk.Label(control_frame, text="History (points):").grid(row=1, column=6)
+        self.history_var = tk.StringVar(value=str(self.max_data_points))
+        self.history_entry = ttk.Entry(control_frame, textvariable=self.history_var, width=10)
+        self.history_entry.grid(row=1, column=7)
+
         # Calibration Settings
         ttk.Label(control_frame, text="Calibration:").grid(row=2, column=0, sticky='w', pady=(10, 0))
 
         ttk.Label(control_frame, text="Gradient:").grid(row=3, column=0)
-        self.gradient_var = tk.StringVar(value="1.0")
+        self.gradient_var = tk.StringVar(value=self.channels[0]['gradient'])
         self.gradient_entry = ttk.Entry(control_frame, textvariable=self.gradient_var, width=10)
         self.gradient_entry.grid(row=3, column=1)
 
         ttk.Label(control_frame, text="Y-Intercept:").grid(row=3, column=2)
-        self.yint_var = tk.StringVar(value="0.0")
+        self.yint_var = tk.StringVar(value=self.channels[0]['y_intercept'])
         self.yint_entry = ttk.Entry(control_frame, textvariable=self.yint_var, width=10)
         self.yint_entry.grid(row=3, column=3)
 
         ttk.Label(control_frame, text="Emissivity:").grid(row=3, column=4)
-        self.emis_var = tk.StringVar(value="1.0")
+        self.emis_var = tk.StringVar(value=self.channels[0]['emissivity'])
         self.emis_entry = ttk.Entry(control_frame, textvariable=self.emis_var, width=10)
         self.emis_entry.grid(row=3, column=5)
 
@@ -123,6 +155,129 @@ class LiveTemperatureMonitor:
         ttk.Button(control_frame, text="Save Data", command=self.save_data).grid(row=5, column=2, pady=10)
         ttk.Button(control_frame, text="Clear Plot", command=self.clear_plot).grid(row=5, column=3, pady=10)
 
+        # Stage timings of the render loop
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Record Timings", variable=self.profile_var,
+                        command=self.toggle_profiling).grid(row=5, column=4, pady=10)
+        ttk.Button(control_frame, text="Save Timings", command=self.save_timings).grid(row=5, column=5, pady=10)
+
+        # Every sample to binary captures GUI2 can open, not just the plot history
+        self.record_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Record", variable=self.record_var).grid(row=5, column=6, pady=10)
+
+        # New recording file after this many MB or minutes, blank for no limit
+        ttk.Label(control_frame, text="Rotate (MB):").grid(row=6, column=0)
+        self.rotate_mb_var = tk.StringVar(value="1024")
+        ttk.Entry(control_frame, textvariable=self.rotate_mb_var, width=10).grid(row=6, column=1)
+        ttk.Label(control_frame, text="Rotate (min):").grid(row=6, column=2)
+        self.rotate_min_var = tk.StringVar(value="60")
+        ttk.Entry(control_frame, textvariable=self.rotate_min_var, width=10).grid(row=6, column=3)
+
+        # Channels sampled together in one task, the fields above edit the selected one
+        channel_frame = ttk.Frame(main_frame)
+        channel_frame.pack(fill=tk.X, padx=10)
+
+        self.channel_fields = {'channel': self.channel_var, 'gradient': self.gradient_var,
+                               'y_intercept': self.yint_var, 'emissivity': self.emis_var}
+        self.channel_table = ttk.Treeview(channel_frame, columns=tuple(self.channel_fields), show='headings',
+                                          height=4, selectmode='browse')
+        for key, heading in zip(self.channel_fields, ("Channel", "Gradient", "Y-Intercept", "Emissivity")):
+            self.channel_table.heading(key, text=heading)
+            self.channel_table.column(key, width=120)
+        self.channel_table.grid(row=0, column=0, rowspan=3, sticky='we')
+        self.channel_table.bind('<<TreeviewSelect>>', self.select_channel)
+        for key, var in self.channel_fields.items():
+            var.trace_add('write', lambda *args, key=key: self.edit_channel(key))
+
+        ttk.Button(channel_frame, text="Add Channel", command=self.add_channel).grid(row=0, column=1, padx=10)
+        ttk.Button(channel_frame, text="Remove Channel", command=self.remove_channel).grid(row=1, column=1, padx=10)
+        ttk.Radiobutton(channel_frame, text="Overlaid", variable=self.layout_var,
+                        value="overlaid").grid(row=0, column=2, sticky='w')
+        ttk.Radiobutton(channel_frame, text="Stacked", variable=self.layout_var,
+                        value="stacked").grid(row=1, column=2, sticky='w')
+        self.refresh_channel_table()
+
+        # Status line
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(main_frame, textvariable=self.status_var, anchor='w').pack(fill=tk.X, padx=10, pady=(0, 5))
+
+    def setup_plot(self):
+        """One axes with every channel overlaid, or one axes per channel stacked"""
+        if self.live_plot is not None:
+            self.live_plot.disconnect()
+        self.fig.clear()
+        count = len(self.channels)
+        stacked = self.layout_var.get() == "stacked" and count > 1
+        if stacked:
+            self.axes = list(self.fig.subplots(count, 1, sharex=True))
+        else:
+            self.axes = [self.fig.add_subplot()]
+        for ax in self.axes:
+            ax.set_ylabel(f'Temperature (°{self.temp_units})')
+            ax.grid(True)
+        self.axes[-1].set_xlabel('Time (s)')
+
+        # Blitted traces, axes only redrawn when the data leaves the current limits
+        self.live_plot = LivePlot(self.canvas)
+        self.lines = []
+        for i, channel in enumerate(self.channels):
+            ax = self.axes[i] if stacked else self.axes[0]
+            self.lines.append(self.live_plot.addLine(ax, 'r-' if count == 1 else f'C{i}-', label=channel['channel']))
+        if count > 1:
+            for ax in self.axes:
+                ax.legend(loc='upper left')
+        self.canvas.draw()
+
+    def refresh_channel_table(self):
+        """Show the channel rows and select the one being edited"""
+        self.channel_table.delete(*self.channel_table.get_children())
+        for i, channel in enumerate(self.channels):
+            self.channel_table.insert('', tk.END, iid=str(i), values=[channel[key] for key in self.channel_fields])
+        self.channel_table.selection_set(str(self.selected_channel))
+
+    def select_channel(self, event=None):
+        """Fill the channel and calibration fields from the selected row"""
+        selection = self.channel_table.selection()
+        if not selection:
+            return
+        self.selected_channel = int(selection[0])
+        self.loading_channel = True
+        for key, var in self.channel_fields.items():
+            var.set(self.channels[self.selected_channel][key])
+        self.loading_channel = False
+
+    def edit_channel(self, key):
+        """Copy an edited field into the selected row"""
+        if self.loading_channel:
+            return
+        value = self.channel_fields[key].get()
+        self.channels[self.selected_channel][key] = value
+        self.channel_table.set(str(self.selected_channel), key, value)
+
+    def add_channel(self):
+        """Add the next analog input, starting from the selected channel's calibration"""
+        if self.running:
+            return
+        channel = dict(self.channels[self.selected_channel])
+        channel['channel'] = f"ai{len(self.channels)}"
+        self.channels.append(channel)
+        self.selected_channel = len(self.channels) - 1
+        self.refresh_channel_table()
+
+    def remove_channel(self):
+        """Remove the selected channel, one is always kept"""
+        if self.running or len(self.channels) == 1:
+            return
+        del self.channels[self.selected_channel]
+        self.selected_channel = min(self.selected_channel, len(self.channels) - 1)
+        self.refresh_channel_table()
+
+    def allocate_buffers(self):
+        """Preallocate the plot/export ring buffers for max_data_points samples of every channel"""
+        self.time_buffer = RingBuffer(self.max_data_points)
+        self.voltage_buffer = RingBuffer(self.max_data_points, self.dtype, channels=len(self.channels))
+        self.temp_buffer = RingBuffer(self.max_data_points, self.dtype, channels=len(self.channels))
+
     def start_acquisition(self):
         """Start reading from the DAQ device"""
         if self.running:
@@ -130,45 +285,76 @@ class LiveTemperatureMonitor:
 
         try:
             self.sample_rate = float(self.sample_rate_var.get())
-            self.gradient = float(self.gradient_var.get())
-            self.y_intercept = float(self.yint_var.get())
-            self.emissivity = float(self.emis_var.get())
+            self.gradient = np.array([[float(channel['gradient'])] for channel in self.channels])
+            self.y_intercept = np.array([[float(channel['y_intercept'])] for channel in self.channels])
+            self.emissivity = np.array([[float(channel['emissivity'])] for channel in self.channels])
             self.temp_units = self.unit_var.get()
-
-            # Create DAQ task
-            self.task = nidaqmx.Task()
-            channel = f"{self.device_var.get()}/{self.channel_var.get()}"
-            self.task.ai_channels.add_ai_voltage_chan(
-                channel,
-                terminal_config=TerminalConfiguration.DIFF
-            )
-            self.task.timing.cfg_samp_clk_timing(
-                rate=self.sample_rate,
-                sample_mode=AcquisitionType.CONTINUOUS,
-                samps_per_chan=self.samples_per_chunk
-            )
+            dtype = np.dtype(self.precision_var.get())
+
+            history = int(self.history_var.get())
+            if history < 1:
+                raise ValueError("History must be at least 1 point")
+            if (history != self.max_data_points or self.temp_buffer.channels != len(self.channels)
+                    or dtype != self.dtype):
+                self.max_data_points = history
+                self.dtype = dtype
+                self.allocate_buffers()
+
+            # Read about 20 chunks a second whatever the rate, and keep a second of DAQ buffer
+            self.samples_per_chunk = max(100, int(self.sample_rate // 20))
+
+            channels = [f"{self.device_var.get()}/{channel['channel']}" for channel in self.channels]
+            record_path = None
+            if self.record_var.get():
+                rotate_mb = float(self.rotate_mb_var.get()) if self.rotate_mb_var.get().strip() else None
+                rotate_min = float(self.rotate_min_var.get()) if self.rotate_min_var.get().strip() else None
+                record_path = filedialog.asksaveasfilename(
+                    defaultextension=CAPTURE_EXTENSION,
+                    filetypes=[("Binary Captures", f"*{CAPTURE_EXTENSION}")]
+                )
+                if not record_path:
+                    return
+
+            # Open the NI device or the simulated one
+            self.backend = createBackend(self.backend_var.get())
+            self.backend.open(channels, self.sample_rate, self.samples_per_chunk)
+            self.acquired_channels = [channel['channel'] for channel in self.channels]
+
+            # Acquisition runs on its own thread, the GUI drains the ring buffer when it draws
+            self.ring = RingBuffer(max(int(self.sample_rate * self.ring_seconds), 10 * self.samples_per_chunk),
+                                   channels=len(channels))
+            self.read_pos = 0
+            self.samples_lost = 0
+            self.acquisition = AcquisitionThread(self.backend, self.ring, self.samples_per_chunk)
+            if record_path:
+                self.recorder = CaptureRecorder(
+                    self.ring, record_path, self.sample_rate, channels,
+                    calibration=np.hstack([self.gradient, self.y_intercept, self.emissivity]),
+                    units=self.temp_units, dtype=self.dtype,
+                    maxBytes=rotate_mb * 2**20 if rotate_mb else None,
+                    maxSeconds=rotate_min * 60 if rotate_min else None,
+                    acquisition=self.acquisition  # Headers take their start time from the device starting
+                )
+                self.recorder.start()
+            self.acquisition.start()
 
             self.running = True
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
 
-            # Start animation
-            self.ani = FuncAnimation(
-                self.fig,
-                self.update_plot,
-                interval=50,
-                blit=True,
-                cache_frame_data=False
-            )
-            self.canvas.draw()
-
-            # Start reading thread
-            self.root.after(100, self.read_data)
+            # Start rendering
+            self.setup_plot()
+            self.render_job = self.root.after(self.render_interval, self.update_plot)
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to start acquisition:\n{str(e)}")
-            if self.task:
-                self.task.close()
+            if self.acquisition:
+                self.acquisition.stop()
+                self.acquisition = None
+            if self.backend:
+                self.backend.close()
+                self.backend = None
+            self.stop_recorder()
             self.running = False
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
@@ -176,77 +362,144 @@ class LiveTemperatureMonitor:
     def stop_acquisition(self):
         """Stop the DAQ acquisition"""
         self.running = False
-        if self.task:
-            self.task.close()
-            self.task = None
-        if self.ani:
-            self.ani.event_source.stop()
+        if self.acquisition:
+            self.acquisition.stop()
+        if self.backend:
+            self.backend.close()  # Unblocks a read in progress
+            self.backend = None
+        if self.acquisition:
+            self.acquisition.join(timeout=2.0)
+            self.acquisition = None
+        if self.render_job:
+            self.root.after_cancel(self.render_job)
+            self.render_job = None
+        self.update_plot()  # Draw the samples that arrived after the last frame
+        self.stop_recorder()
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
 
-    def read_data(self):
-        """Read data from DAQ in chunks"""
-        if not self.running or not self.task:
+    def stop_recorder(self):
+        """Write what is left in the ring and close the recording, if there is one"""
+        if self.recorder is None:
             return
-
-        try:
-            # Read a chunk of data
-            data = self.task.read(
-                number_of_samples_per_channel=self.samples_per_chunk,
-                timeout=1.0
-            )
-
-            # Process data
-            current_time = len(self.time_buffer) / self.sample_rate
-            time_chunk = np.linspace(
-                current_time,
-                current_time + (len(data) - 1) / self.sample_rate,
-                len(data)
-            )
-
-            # Apply emissivity compensation
-            voltage_chunk = emisComp(data, self.emissivity)
-
-            # Convert to temperature
-            temp_chunk = voltToTemp(
+        self.recorder.stop()
+        self.recorder.join()
+        stats = self.recorder.stats()
+        self.status_var.set(f"Recorded {stats['samples']} samples ({stats['lost']} lost) "
+                            f"to {len(stats['files'])} file(s) from {stats['files'][0] if stats['files'] else '-'}")
+        if self.recorder.error is not None:
+            messagebox.showerror("Error", f"Recording failed:\n{str(self.recorder.error)}")
+        self.recorder = None
+
+    def drain_data(self):
+        """Move the samples captured since the last frame from the ring buffer into the plot buffers"""
+        if self.ring is None:
+            return None
+
+        start, data = self.ring.read(self.read_pos)
+        count = data.shape[-1]
+        if start > self.read_pos:
+            self.samples_lost += start - self.read_pos  # Fell more than the ring behind
+        self.read_pos = start + count
+        if count == 0:
+            return None
+
+        # Timebase from the sample index, so it keeps advancing once the plot buffers are full
+        time_chunk = np.arange(start, start + count) / self.sample_rate
+
+        # Apply emissivity compensation, every channel at once with its own emissivity
+        with profiler.stage('emisComp', data.size):
+            voltage_chunk = emisCompArr(data, self.emissivity, dtype=self.dtype)
+
+        # Convert to temperature, (channels, samples) in one pass
+        with profiler.stage('voltToTemp', data.size):
+            temp_chunk = voltToTempArr(
                 celsius=(self.temp_units == "C"),
                 m=self.gradient,
                 c=self.y_intercept,
-                vArr=voltage_chunk
+                vArr=voltage_chunk,
+                dtype=self.dtype
             )
 
-            # Update buffers
-            self.time_buffer.extend(time_chunk)
-            self.voltage_buffer.extend(voltage_chunk)
-            self.temp_buffer.extend(temp_chunk)
-
-            # Schedule next read
-            self.root.after(10, self.read_data)
-
-        except Exception as e:
+        # Update buffers
+        self.time_buffer.write(time_chunk)
+        self.voltage_buffer.write(voltage_chunk)
+        self.temp_buffer.write(temp_chunk)
+        return temp_chunk
+
+    def update_plot(self):
+        """Draw one frame and schedule the next while acquiring"""
+        self.render_job = None
+        if self.running and self.recorder and self.recorder.error is not None:
+            self.stop_acquisition()  # Reports the error
+            return
+        if self.acquisition and self.acquisition.error is not None:
+            error = self.acquisition.error
             self.stop_acquisition()
-            messagebox.showerror("Error", f"Acquisition error:\n{str(e)}")
+            messagebox.showerror("Error", f"Acquisition error:\n{str(error)}")
+            return
 
-    def update_plot(self, frame):
-        """Update the plot with new data"""
+        with profiler.stage('drain'):
+            new_temps = self.drain_data()
         if len(self.time_buffer) > 0:
-            self.line.set_data(self.time_buffer, self.temp_buffer)
-            self.ax.relim()
-            self.ax.autoscale_view()
-            self.ax.set_ylabel(f'Temperature (°{self.temp_units})')
-        return self.line,
+            # Only the min/max of each pixel column is drawn, limits follow the new samples only
+            with profiler.stage('decimate', len(self.time_buffer) * len(self.lines)):
+                time_data, temp_data = minMaxDecimate(self.time_buffer.latest(), self.temp_buffer.latest(),
+                                                      max(int(self.axes[0].bbox.width), 1))
+            with profiler.stage('render', temp_data.size):
+                for i, line in enumerate(self.lines):
+                    self.live_plot.setData(line, time_data[i], temp_data[i],
+                                           new_temps[i] if new_temps is not None else temp_data[i, :0])
+                self.live_plot.render()
+        self.update_status()
+
+        if self.running:
+            self.render_job = self.root.after(self.render_interval, self.update_plot)
+
+    def update_status(self):
+        """Samples taken and lost, plus the stage timings when recording"""
+        status = f"Samples: {self.read_pos}  Lost: {self.samples_lost}"
+        if self.recorder:
+            stats = self.recorder.stats()
+            status += (f"  Recording: {stats['samples']} written, backlog {stats['backlog']}, "
+                       f"{len(stats['files'])} file(s)")
+            if stats['throughput']:
+                status += f", {stats['throughput'] / 2**20:.0f} MB/s"
+        if profiler.enabled:
+            status += f"  Frames drawn in full: {self.live_plot.fullDraws}  |  {profiler.summary()}"
+        self.status_var.set(status)
+
+    def toggle_profiling(self):
+        profiler.enabled = self.profile_var.get()
+        if profiler.enabled:
+            profiler.reset()
+        self.update_status()
+
+    def save_timings(self):
+        """Save the recorded stage timings to JSON"""
+        if not profiler.records():
+            messagebox.showwarning("Warning", "No timings recorded")
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")])
+        if file_path:
+            try:
+                profiler.dump(file_path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save timings:\n{str(e)}")
 
     def clear_plot(self):
         """Clear the plot data"""
         self.time_buffer.clear()
         self.voltage_buffer.clear()
         self.temp_buffer.clear()
-        self.line.set_data([], [])
+        for line in self.lines:
+            line.set_data([], [])
+        self.live_plot.reset()
         self.canvas.draw()
 
     def save_data(self):
         """Save collected data to CSV"""
-        if not self.time_buffer:
+        if len(self.time_buffer) == 0:
             messagebox.showwarning("Warning", "No data to save")
             return
 
@@ -256,11 +509,17 @@ class LiveTemperatureMonitor:
                 filetypes=[("CSV Files", "*.csv")]
             )
             if file_path:
-                df = pd.DataFrame({
-                    'Time (s)': list(self.time_buffer),
-                    'Voltage (V)': list(self.voltage_buffer),
-                    f'Temperature (°{self.temp_units})': list(self.temp_buffer)
-                })
+                voltages, temps = self.voltage_buffer.latest(), self.temp_buffer.latest()
+                columns = {'Time (s)': self.time_buffer.latest()}
+                if len(voltages) == 1:
+                    columns['Voltage (V)'] = voltages[0]
+                    columns[f'Temperature (°{self.temp_units})'] = temps[0]
+                else:
+                    # Channels as last acquired, the table may have changed since
+                    for i, name in enumerate(self.acquired_channels):
+                        columns[f'{name} Voltage (V)'] = voltages[i]
+                        columns[f'{name} Temperature (°{self.temp_units})'] = temps[i]
+                df = pd.DataFrame(columns)
                 df.to_csv(file_path, index=False)
                 messagebox.showinfo("Success", f"Data saved to {file_path}")
 
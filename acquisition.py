@@ -0,0 +1,126 @@
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from daqbackend import SimulatedBackend
+from recorder import CaptureRecorder
+from ringbuffer import RingBuffer
+
+
+class AcquisitionThread(threading.Thread):
+    # Reads a DaqBackend continuously on its own thread and writes every chunk into a RingBuffer.
+    # The GUI never waits on the DAQ, it only copies what has arrived when it draws a frame.
+    # Chunks are (channels, samples), the ring must have been made with the backend's channel count.
+
+    def __init__(self, backend, ring, samplesPerChunk, timeout=1.0):
+        super().__init__(daemon=True)
+        self.backend = backend
+        self.ring = ring
+        self.samplesPerChunk = samplesPerChunk
+        self.timeout = timeout
+        self.error = None # exception that stopped the thread, checked by the GUI
+        self.startTime = None # Unix time of the first sample, set once the device has started
+        self._stopEvent = threading.Event()
+
+    def run(self):
+        # read straight into this, no Python lists
+        chunk = np.empty((self.backend.channelCount, self.samplesPerChunk), dtype=np.float64)
+        try:
+            self.backend.start()
+            self.startTime = time.time() # sampling is clocked from here, not from when the thread was made
+            while not self._stopEvent.is_set():
+                n = self.backend.readInto(chunk, self.timeout)
+                self.ring.write(chunk[:, :n])
+        except Exception as e:
+            if not self._stopEvent.is_set():
+                self.error = e
+
+    def stop(self):
+        self._stopEvent.set()
+
+    def stopped(self):
+        return self._stopEvent.is_set()
+
+
+def measureThroughput(backend, sampleRate, seconds, samplesPerChunk=None, drainInterval=0.05, ringSeconds=10,
+                      channels=1, recordPath=None, rotateBytes=None):
+    # Runs backend -> acquisition thread -> ring buffer -> consumer for a while, the consumer draining
+    # the ring every drainInterval like the live monitor's plot does, and reports what got through.
+    # With recordPath a CaptureRecorder writes everything to disk alongside, as the live monitor's Record does.
+    samplesPerChunk = samplesPerChunk or max(100, int(sampleRate // 20))
+    backend.open([f"sim/ai{i}" for i in range(channels)], sampleRate, samplesPerChunk)
+    ring = RingBuffer(max(int(sampleRate * ringSeconds), 10 * samplesPerChunk), channels=channels)
+    thread = AcquisitionThread(backend, ring, samplesPerChunk)
+    recorder = None
+    if recordPath:
+        recorder = CaptureRecorder(ring, recordPath, sampleRate, [f"sim/ai{i}" for i in range(channels)],
+                                   maxBytes=rotateBytes, acquisition=thread)
+    readPos = 0
+    lost = 0
+
+    start = time.perf_counter()
+    thread.start()
+    if recorder:
+        recorder.start()
+    while time.perf_counter() - start < seconds and thread.error is None:
+        time.sleep(drainInterval)
+        first, data = ring.read(readPos)
+        lost += first - readPos
+        readPos = first + data.shape[-1]
+    thread.stop()
+    backend.close()
+    thread.join(timeout=2.0)
+    elapsed = time.perf_counter() - start
+    if recorder:
+        recorder.stop()
+        recorder.join()
+    first, data = ring.read(readPos)
+    lost += first - readPos
+    readPos = first + data.shape[-1]
+
+    dropped = getattr(backend, 'droppedSamples', 0)
+    return {
+        'sample_rate': sampleRate,
+        'channels': channels,
+        'seconds': elapsed,
+        'samples': readPos - lost,
+        'throughput': (readPos - lost) / elapsed,
+        'dropped_by_device': dropped,
+        'lost_in_ring': lost,
+        'error': None if thread.error is None else str(thread.error),
+        'recorder': None if recorder is None else dict(recorder.stats(), error=recorder.error),
+    }
+
+
+if __name__ == "__main__":
+    # e.g. python acquisition.py --rates 1000 10000 100000 500000 --seconds 5 --signal chopper
+    parser = argparse.ArgumentParser(description="Sustained throughput of the live acquisition path on the simulated device")
+    parser.add_argument("--rates", type=float, nargs="+", default=[1000, 10000, 100000, 250000])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--signal", choices=["plateau", "chopper", "step"], default="chopper")
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--record", help="also record to this .irc file, numbered per rate")
+    parser.add_argument("--rotate-mb", type=float, help="start a new recording file every this many MB")
+    args = parser.parse_args()
+
+    print(f"{'rate (Hz)':>12} {'samples':>10} {'throughput':>12} {'dropped':>9} {'lost':>7}")
+    for rate in args.rates:
+        recordPath = None
+        if args.record:
+            stem, ext = os.path.splitext(args.record)
+            recordPath = f"{stem}_{rate:.0f}Hz{ext or '.irc'}"
+        result = measureThroughput(SimulatedBackend(args.signal), rate, args.seconds, channels=args.channels,
+                                   recordPath=recordPath,
+                                   rotateBytes=args.rotate_mb * 2**20 if args.rotate_mb else None)
+        print(f"{rate:12.0f} {result['samples']:10d} {result['throughput']:12.0f} "
+              f"{result['dropped_by_device']:9d} {result['lost_in_ring']:7d}"
+              + (f"  error: {result['error']}" if result['error'] else ""))
+        recorded = result['recorder']
+        if recorded:
+            print(f"{'':12} recorded {recorded['samples']} samples to {len(recorded['files'])} files, "
+                  f"{recorded['throughput'] / 2**20 if recorded['throughput'] else 0:.0f} MB/s writing, "
+                  f"max backlog {recorded['max_backlog']}, lost {recorded['lost']}"
+                  + (f"  error: {recorded['error']}" if recorded['error'] else ""))
@@ -1,24 +1,65 @@
-from queue import Queue
+import numpy as np
 
-def simpleAvg(yArr : list, holdParameter):
+BLOCK_SIZE = 1 << 20 # long captures are averaged in blocks so the cumulative sums stay small
+
+
+class MovingAverage:
+    # Moving averages for several window sizes at once, fed in chunks.
+    # The last max(holdParameters)-1 samples are carried over between chunks, so a stream fed
+    # chunk by chunk gives the same result as one multiAvg call over the whole stream.
+    # Until a window is full the average is over all samples seen so far (same warm-up as before).
+
+    def __init__(self, holdParameters, dtype=np.float64):
+        self.holdParameters = [int(hold) for hold in holdParameters]
+        if not self.holdParameters or min(self.holdParameters) < 1:
+            raise ValueError("Averaging windows must be at least 1 sample")
+        self.dtype = dtype
+        self.reset()
+
+    def reset(self):
+        self.count = 0 # total samples seen
+        self.history = np.empty(0, dtype=np.float64) # tail of the previous chunks
 
-    hold = 0
-    total = 0
-    currAvg = 0
-    avg = []
-    queue = Queue(maxsize=holdParameter)
+    def update(self, yChunk):
+        # returns an array of shape (len(holdParameters), len(yChunk))
+        y = np.asarray(yChunk, dtype=np.float64)
+        n = len(y)
+        out = np.empty((len(self.holdParameters), n), dtype=self.dtype)
+        if n == 0:
+            return out
 
-    for i in range(len(yArr)):
+        ext = np.concatenate((self.history, y))
+        h = len(self.history)
+        ref = ext[0] # sum deviations from the first value to keep rounding error small
+        cs = np.empty(len(ext) + 1)
+        cs[0] = 0.0
+        np.cumsum(ext - ref, out=cs[1:])
 
-        if not queue.full():
-            queue.put(yArr[i])
-            total = total + yArr[i]
-            currAvg = total / (i+1)
+        for k, hold in enumerate(self.holdParameters):
+            # warm-up: window not full yet, average over everything seen so far
+            w = max(0, min(n, hold - 1 - self.count))
+            if w:
+                out[k, :w] = cs[h + 1:h + 1 + w] / np.arange(self.count + 1, self.count + w + 1) + ref
+            # full window: (sum up to i) - (sum up to i - hold)
+            out[k, w:] = (cs[h + 1 + w:h + n + 1] - cs[h + 1 + w - hold:h + n + 1 - hold]) / hold + ref
 
-        else:
-            total = (currAvg * holdParameter) + yArr[i] - queue.get() #  new sum = the current average * the amount of values that made the average + new value - old value
-            queue.put(yArr[i])
-            currAvg = total / holdParameter
+        keep = max(self.holdParameters) - 1
+        self.history = ext[max(len(ext) - keep, 0):].copy() if keep else ext[:0].copy()
+        self.count += n
+        return out
 
-        avg.append(currAvg) # add current average to list
-    return avg
+
+def multiAvg(yArr, holdParameters, dtype=np.float64):
+    # moving averages of yArr for every window in holdParameters in one pass
+    # returns an array of shape (len(holdParameters), len(yArr)), e.g. avg5, avg20 = multiAvg(y, [5, 20])
+    y = np.asarray(yArr, dtype=np.float64)
+    averager = MovingAverage(holdParameters, dtype)
+    out = np.empty((len(averager.holdParameters), len(y)), dtype=dtype)
+    for start in range(0, len(y), BLOCK_SIZE):
+        out[:, start:start + BLOCK_SIZE] = averager.update(y[start:start + BLOCK_SIZE])
+    return out
+
+
+def simpleAvg(yArr : list, holdParameter):
+    # list version kept for the plotting scripts
+    return multiAvg(yArr, [holdParameter])[0].tolist()
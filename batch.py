@@ -0,0 +1,181 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from calibration import findLinParams, readCalFile
+from captureio import readCapture
+from pipeline import process
+
+# Headless batch processing of capture files, the same pipeline GUI2 runs (emissivity compensation,
+# conversion, sample range, peak detection, averaging) without a display, one file per worker process.
+# Writes <name>_processed.csv for every capture and summary.csv with one row per file.
+#
+# e.g. python batch.py "Raw Data/runs/*.csv" --cal furnace.cal --emissivity 0.9 --time-constant 0.01 --average 20
+#      python batch.py "Raw Data/runs" --calibration-folder "Raw Data/Measurements26Feb" --workers 8 --out processed
+
+SUMMARY_NAME = "summary.csv"
+PROCESSED_SUFFIX = "_processed.csv"
+
+
+def findCaptures(inputs, outDir=None):
+    # Files, folders (every .csv in them) and glob patterns, in the order given, without duplicates.
+    # Earlier results are left out: everything under outDir, or only the processed files and summary
+    # when outDir is itself one of the input folders.
+    outDir = os.path.abspath(outDir) if outDir else None
+    outIsInput = outDir is not None and any(os.path.isdir(item) and os.path.abspath(item) == outDir
+                                            for item in inputs)
+
+    def isOutput(path):
+        if outDir is None or os.path.commonpath([path, outDir]) != outDir:
+            return False
+        name = os.path.basename(path)
+        return not outIsInput or name == SUMMARY_NAME or name.endswith(PROCESSED_SUFFIX)
+
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(glob.glob(os.path.join(item, "*.csv")))
+        elif os.path.isfile(item):
+            matches = [item]
+        else:
+            matches = sorted(glob.glob(item, recursive=True))
+        for path in matches:
+            path = os.path.abspath(path)
+            if path not in files and not isOutput(path):
+                files.append(path)
+    return files
+
+
+def outputPath(filePath, outDir):
+    return os.path.join(outDir, os.path.splitext(os.path.basename(filePath))[0] + PROCESSED_SUFFIX)
+
+
+def processCapture(filePath, params, units, outDir):
+    # Worker: load, process and write one capture. Returns its summary row, errors included rather than
+    # raised so one bad file doesn't stop the batch.
+    summary = {'file': filePath, 'output': None, 'samples': 0, 'duration (s)': np.nan,
+               'min': np.nan, 'max': np.nan, 'mean': np.nan, 'std': np.nan, 'final': np.nan,
+               'seconds': 0.0, 'error': ''}
+    start = time.perf_counter()
+    try:
+        timeData, voltage = readCapture(filePath, dtype=params.get('dtype', np.float64))
+        fileParams = dict(params, end=len(timeData) if params['end'] is None else params['end'])
+        timeData, temp = process(timeData, voltage, fileParams)
+        if units == 'C':
+            temp = temp - 273.15 # pipeline results are Kelvin
+
+        out = outputPath(filePath, outDir)
+        pd.DataFrame({'Time (s)': timeData, f"Temperature (°{units})": temp}).to_csv(
+            out, index=False, float_format='%.9g')
+
+        finite = temp[np.isfinite(temp)]
+        summary.update({
+            'output': out,
+            'samples': len(temp),
+            'duration (s)': timeData[-1] - timeData[0] if len(timeData) else np.nan,
+        })
+        if len(finite):
+            summary.update({'min': finite.min(), 'max': finite.max(), 'mean': finite.mean(),
+                            'std': finite.std(), 'final': temp[-1]})
+    except Exception as e:
+        summary['error'] = f"{type(e).__name__}: {e}"
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def runBatch(files, params, units='C', outDir="processed", workers=None, log=print):
+    # Processes files on a pool of worker processes and writes the summary. Returns the summary rows
+    # in the order of files.
+    os.makedirs(outDir, exist_ok=True)
+    rows = {}
+    if workers == 1:
+        for filePath in files:
+            rows[filePath] = processCapture(filePath, params, units, outDir)
+            logResult(log, len(rows), len(files), rows[filePath])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(processCapture, filePath, params, units, outDir): filePath for filePath in files}
+            for future in as_completed(futures):
+                rows[futures[future]] = future.result()
+                logResult(log, len(rows), len(files), rows[futures[future]])
+
+    summary = [rows[filePath] for filePath in files]
+    pd.DataFrame(summary).to_csv(os.path.join(outDir, SUMMARY_NAME), index=False)
+    return summary
+
+
+def logResult(log, done, total, row):
+    name = os.path.basename(row['file'])
+    if row['error']:
+        log(f"[{done}/{total}] {name}: FAILED {row['error']}")
+    else:
+        log(f"[{done}/{total}] {name}: {row['samples']} samples, mean {row['mean']:.2f}, {row['seconds']:.2f} s")
+
+
+def calibrationFromArgs(args, parser):
+    # (m, c) from a .cal file, given values or a calibration folder, in that order of preference
+    if args.cal:
+        m, c, _ = readCalFile(args.cal)
+        return m, c
+    if args.gradient is not None and args.intercept is not None:
+        return args.gradient, args.intercept
+    if args.calibration_folder:
+        return findLinParams(folderStr=args.calibration_folder, lowestTemp=args.lowest, highestTemp=args.highest,
+                             increment=args.increment, samples=args.cal_samples, celsius=True)
+    parser.error("a calibration is needed: --cal, --gradient and --intercept, or --calibration-folder")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process capture files to temperature without the GUI")
+    parser.add_argument("inputs", nargs="+", help="capture files, folders of .csv captures or glob patterns")
+    cal = parser.add_argument_group("calibration")
+    cal.add_argument("--cal", help=".cal file saved by GUI2")
+    cal.add_argument("--gradient", type=float, help="m of lnV = m/T + c")
+    cal.add_argument("--intercept", type=float, help="c of lnV = m/T + c")
+    cal.add_argument("--calibration-folder", help="folder of [TEMP].csv / [TEMP]B.csv calibration captures")
+    cal.add_argument("--lowest", type=int, default=600, help="lowest calibration temperature (°C)")
+    cal.add_argument("--highest", type=int, default=1300, help="highest calibration temperature (°C)")
+    cal.add_argument("--increment", type=int, default=100, help="calibration temperature step (°C)")
+    cal.add_argument("--cal-samples", type=int, default=500, help="samples averaged per calibration point")
+    proc = parser.add_argument_group("processing")
+    proc.add_argument("--emissivity", type=float, default=1.0)
+    proc.add_argument("--time-constant", type=float, help="peak detection time constant (s), off if not given")
+    proc.add_argument("--average", type=int, help="moving average samples, off if not given")
+    proc.add_argument("--start", type=int, default=0, help="first sample to keep")
+    proc.add_argument("--end", type=int, help="sample to stop before (default: end of file)")
+    proc.add_argument("--units", choices=["C", "K"], default="C")
+    proc.add_argument("--precision", choices=["float64", "float32"], default="float64",
+                      help="float32 halves the memory per capture")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--out", default="processed", help="output folder (default: processed)")
+    args = parser.parse_args(argv)
+
+    if not 0 < args.emissivity <= 1.0:
+        parser.error("emissivity must be in (0, 1]")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    files = findCaptures(args.inputs, args.out)
+    if not files:
+        parser.error("no capture files found")
+    m, c = calibrationFromArgs(args, parser)
+
+    params = {'emissivity': args.emissivity, 'gradient': m, 'intercept': c,
+              'start': args.start, 'end': args.end,
+              'timeConstant': args.time_constant, 'samples': args.average, 'dtype': args.precision}
+    print(f"{len(files)} files, m = {m}, c = {c}")
+    start = time.perf_counter()
+    summary = runBatch(files, params, args.units, args.out, args.workers)
+    failed = sum(1 for row in summary if row['error'])
+    print(f"Done in {time.perf_counter() - start:.1f} s, {len(files) - failed} processed, {failed} failed, "
+          f"summary in {os.path.join(args.out, SUMMARY_NAME)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from averaging import multiAvg
+from calibration import findLinParams, voltToTempArr, emisCompArr
+from captureio import readCapture
+from daqbackend import SimulatedBackend, SIM_GRADIENT, SIM_INTERCEPT
+from peakdetect import peakDetect
+from pipeline import process
+from timeparse import parseTimestamps
+
+# Benchmarks of the numeric core and capture loading on synthetic captures.
+# Captures are generated once per size/format/seed into DATA_DIR in the same layout as Raw Data/:
+#   'datetime'  Time,Dev1/ai0 with dd/mm/yyyy HH:MM:SS.ffffff at 1 kHz (chopperSquare.csv, Emissivity/)
+#   'minutes'   Time,Dev1/ai0,Average with mm:ss.f at 10 Hz (Measurements26Feb/)
+# and the voltages are the simulated chopper signal with a fixed seed, so every run sees the same data.
+# Each stage is timed best-of-repeats, then run once more under tracemalloc for its peak allocation.
+# Results can be saved as a baseline and later runs compared against it.
+# The precision check runs the pipeline in float32 and float64 over the calibrated range and fails the run
+# if they differ by more than PRECISION_TOLERANCE.
+#
+# e.g. python benchmark.py --save-baseline bench_baseline.json
+#      python benchmark.py --compare bench_baseline.json --sizes 10000 100000 1000000
+
+DATA_DIR = "benchmark_data"
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+FORMATS = {'datetime': 1000.0, 'minutes': 10.0} # format -> sample rate
+WRITE_ROWS = 1 << 20 # rows generated and written at a time
+EMISSIVITY = 0.9
+TIME_CONSTANT = 0.05
+AVERAGE_SAMPLES = 20
+CAL_TEMPS = range(600, 1301, 100)
+CAL_DARK = 1e-4 # blocked voltage, below the 600 °C signal
+PRECISION_SAMPLES = 1_000_000
+PRECISION_TOLERANCE = 0.01 # °C, largest float32 pipeline error accepted
+
+
+def _digits(values, width):
+    # (n, width) ASCII digits of non-negative integers, zero padded
+    out = np.empty((len(values), width), dtype=np.uint8)
+    values = np.asarray(values, dtype=np.int64)
+    for col in range(width - 1, -1, -1):
+        out[:, col] = values % 10 + ord('0')
+        values = values // 10
+    return out
+
+
+def _joinColumns(parts):
+    # fixed-width strings from a list of (n, w) digit matrices and single separator characters
+    n = next(len(part) for part in parts if not isinstance(part, str))
+    cols = [np.full((n, 1), ord(part), dtype=np.uint8) if isinstance(part, str) else part for part in parts]
+    chars = np.ascontiguousarray(np.hstack(cols))
+    return chars.view(f'S{chars.shape[1]}').ravel().astype(str)
+
+
+def timeStrings(fmt, index, sampleRate):
+    if fmt == 'datetime':
+        # 12/03/2025 10:54:57.160000 onwards, like chopperSquare.csv
+        start = np.datetime64('2025-03-12T10:54:57.160000')
+        stamps = start + (index * (1e6 / sampleRate)).astype('timedelta64[us]')
+        iso = np.datetime_as_string(stamps, unit='us').astype('S26').view(np.uint8).reshape(-1, 26)
+        return _joinColumns([iso[:, 8:10], '/', iso[:, 5:7], '/', iso[:, 0:4], ' ', iso[:, 11:26]])
+    # mm:ss.f from 25:39.6, rolling over every hour like the Measurements26Feb captures
+    tenths = 25 * 600 + 39 * 10 + 6 + (index * (10 / sampleRate)).astype(np.int64)
+    return _joinColumns([_digits(tenths // 600 % 60, 2), ':', _digits(tenths // 10 % 60, 2), '.',
+                         _digits(tenths % 10, 1)])
+
+
+def writeCapture(path, samples, fmt='datetime', seed=0):
+    # synthetic chopper capture of the given size and format
+    sampleRate = FORMATS[fmt]
+    device = SimulatedBackend('chopper', seed=seed, chopperFrequency=sampleRate / 8)
+    device.open("sim", sampleRate, WRITE_ROWS)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write("Time,Dev1/ai0,Average\n" if fmt == 'minutes' else "Time,Dev1/ai0\n")
+        for first in range(0, samples, WRITE_ROWS):
+            index = np.arange(first, min(first + WRITE_ROWS, samples))
+            frame = pd.DataFrame({'Time': timeStrings(fmt, index, sampleRate), 'Dev1/ai0': device.generate(index)[0]})
+            if fmt == 'minutes':
+                frame['Average'] = ''
+            frame.to_csv(f, header=False, index=False, float_format='%.15g', lineterminator='\n')
+    os.replace(tmp, path)
+
+
+def capturePath(samples, fmt, seed, dataDir=DATA_DIR):
+    path = os.path.join(dataDir, f"{fmt}_{samples}_seed{seed}.csv")
+    if not os.path.exists(path):
+        os.makedirs(dataDir, exist_ok=True)
+        print(f"  generating {path}")
+        writeCapture(path, samples, fmt, seed)
+    return path
+
+
+def writeCalibrationFolder(folder, samples=500, seed=0):
+    # [TEMP].csv / [TEMP]B.csv pairs like Measurements26Feb, for timing findLinParams
+    if os.path.exists(os.path.join(folder, f"{CAL_TEMPS[-1]}B.csv")):
+        return folder
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    index = np.arange(samples)
+    times = timeStrings('minutes', index, 10.0)
+    for temperature in CAL_TEMPS:
+        volts = np.exp(SIM_GRADIENT / (temperature + 273.15) + SIM_INTERCEPT)
+        for name, level in ((f"{temperature}.csv", volts), (f"{temperature}B.csv", CAL_DARK)):
+            pd.DataFrame({'Time': times, 'Dev1/ai0': level * (1 + 0.004 * rng.standard_normal(samples)),
+                          'Average': ''}).to_csv(os.path.join(folder, name), index=False, encoding='utf-8-sig')
+    return folder
+
+
+def measure(func, repeats):
+    # best wall time of repeats calls, then the tracemalloc peak of one more
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+CAPTURE_STAGES = ('load', 'timestamps', 'emisComp', 'voltToTemp', 'peakDetect', 'average', 'pipeline',
+                  'pipeline32', 'end-to-end')
+
+
+def captureStages(path, samples, names=CAPTURE_STAGES):
+    # (name, function) of the named stages on one capture. Inputs are prepared outside the timing,
+    # and only the ones those stages use, so e.g. timing 'load' alone never converts anything.
+    inputs = {}
+    prepare = {
+        'capture': lambda: readCapture(path),
+        'timeColumn': lambda: pd.read_csv(path, usecols=[0]).iloc[:, 0].to_numpy(),
+        'voltage32': lambda: get('capture')[1].astype(np.float32),
+        'comp': lambda: emisCompArr(get('capture')[1], EMISSIVITY),
+        'temp': lambda: voltToTempArr(get('comp'), SIM_GRADIENT, SIM_INTERCEPT, celsius=False),
+    }
+
+    def get(key):
+        if key not in inputs:
+            inputs[key] = prepare[key]()
+        return inputs[key]
+
+    params = {'emissivity': EMISSIVITY, 'gradient': SIM_GRADIENT, 'intercept': SIM_INTERCEPT,
+              'start': 0, 'end': samples, 'timeConstant': TIME_CONSTANT, 'samples': AVERAGE_SAMPLES}
+    stages = {
+        'load': lambda: partial(readCapture, path),
+        'timestamps': lambda: partial(parseTimestamps, get('timeColumn')),
+        'emisComp': lambda: partial(emisCompArr, get('capture')[1], EMISSIVITY),
+        'voltToTemp': lambda: partial(voltToTempArr, get('comp'), SIM_GRADIENT, SIM_INTERCEPT, celsius=False),
+        'peakDetect': lambda: partial(peakDetect, get('capture')[0], get('temp'), TIME_CONSTANT),
+        'average': lambda: partial(multiAvg, get('temp'), [AVERAGE_SAMPLES]),
+        'pipeline': lambda: partial(process, *get('capture'), params),
+        'pipeline32': lambda: partial(process, get('capture')[0], get('voltage32'), dict(params, dtype=np.float32)),
+        'end-to-end': lambda: lambda: process(*readCapture(path), params),
+    }
+    return [(name, stages[name]()) for name in names]
+
+
+def calibrationStage(folder):
+    def fit():
+        with contextlib.redirect_stdout(io.StringIO()): # findLinParams prints every point
+            findLinParams(folder, CAL_TEMPS[0], CAL_TEMPS[-1], CAL_TEMPS.step, 500, celsius=True, useCache=False)
+    return fit
+
+
+def precisionErrors(samples=PRECISION_SAMPLES, seed=0):
+    # Largest |float32 - float64| (°C) after each stage of the pipeline, on a noisy ramp through the
+    # calibrated range. The float32 run gets its voltages as float32, the way GUI2 and batch.py load them.
+    rng = np.random.default_rng(seed)
+    temps = np.linspace(CAL_TEMPS[0], CAL_TEMPS[-1], samples) + 273.15
+    voltage = np.exp(SIM_GRADIENT / temps + SIM_INTERCEPT) * EMISSIVITY * (1 + 0.004 * rng.standard_normal(samples))
+    timeData = np.arange(samples) / FORMATS['datetime']
+    params = {'emissivity': EMISSIVITY, 'gradient': SIM_GRADIENT, 'intercept': SIM_INTERCEPT,
+              'start': 0, 'end': samples, 'timeConstant': None, 'samples': None}
+    errors = {}
+    for stage, extra in (('temperature', {}), ('peak', {'timeConstant': TIME_CONSTANT}),
+                         ('average', {'timeConstant': TIME_CONSTANT, 'samples': AVERAGE_SAMPLES})):
+        stageParams = dict(params, **extra)
+        exact = process(timeData, voltage, stageParams)[1]
+        single = process(timeData, voltage.astype(np.float32), dict(stageParams, dtype=np.float32))[1]
+        errors[stage] = float(np.max(np.abs(single - exact)))
+    return errors
+
+
+def runBenchmarks(sizes=SIZES, formats=tuple(FORMATS), repeats=3, seed=0, stages=None, dataDir=DATA_DIR, log=print):
+    # Returns {"stage/format/size": {"seconds", "samples", "peak_mb"}}
+    results = {}
+
+    def record(key, func, samples):
+        seconds, peak = measure(func, repeats)
+        results[key] = {'seconds': seconds, 'samples': samples, 'peak_mb': peak / 2**20}
+        log(f"  {key:<36} {seconds * 1e3:10.2f} ms {samples / seconds / 1e6:9.2f} MS/s {peak / 2**20:9.1f} MB")
+
+    # captures are only generated and loaded when a selected stage runs on them
+    names = [name for name in CAPTURE_STAGES if stages is None or name in stages]
+    for fmt in formats if names else ():
+        for samples in sizes:
+            log(f"{fmt}, {samples} samples")
+            for name, func in captureStages(capturePath(samples, fmt, seed, dataDir), samples, names):
+                record(f"{name}/{fmt}/{samples}", func, samples)
+    if stages is None or 'calibration' in stages:
+        log("calibration")
+        folder = writeCalibrationFolder(os.path.join(dataDir, f"calibration_seed{seed}"), seed=seed)
+        record("calibration/minutes/500", calibrationStage(folder), 500 * 2 * len(CAL_TEMPS))
+    return results
+
+
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'machine': platform.machine(), 'processor': platform.processor(), 'cpus': os.cpu_count()}
+
+
+def compare(results, baseline, tolerance):
+    # stages more than tolerance times slower than the baseline: [(key, seconds, baseline seconds)]
+    regressions = []
+    for key, result in results.items():
+        base = baseline['results'].get(key)
+        ratio = result['seconds'] / base['seconds'] if base else None
+        flag = ""
+        if ratio is not None and ratio > tolerance:
+            regressions.append((key, result['seconds'], base['seconds']))
+            flag = "  REGRESSION"
+        print(f"  {key:<36} {'new' if ratio is None else f'{ratio:6.2f}x'}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the processing stages on synthetic captures")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="capture sizes in samples")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(FORMATS))
+    parser.add_argument("--stages", nargs="+", help="only these stages (default: all)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where synthetic captures are kept")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.sizes, args.formats, args.repeats, args.seed, args.stages, args.data_dir)
+    status = 0
+    precision = None
+    if args.stages is None or 'precision' in args.stages:
+        precision = precisionErrors(seed=args.seed)
+        print(f"float32 error over {CAL_TEMPS[0]}-{CAL_TEMPS[-1]} °C, tolerance {PRECISION_TOLERANCE} °C")
+        for stage, error in precision.items():
+            print(f"  {stage:<12} {error:.2e} °C{'  FAILED' if error > PRECISION_TOLERANCE else ''}")
+        if max(precision.values()) > PRECISION_TOLERANCE:
+            status = 1
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"compared with {args.compare}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} stages slower than {args.tolerance}x the baseline")
+            status = 1
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'environment': environment(), 'seed': args.seed, 'repeats': args.repeats,
+                       'results': results, 'precision': precision}, f, indent=1)
+        print(f"baseline saved to {args.save_baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,6 +19,12 @@ from listMath import listLn, listRcp
 from peakdetect import simplePeakDetect
 import math as math
 
+from concurrent.futures import ThreadPoolExecutor
+
+from calibrationCache import CalibrationCache
+
+BOOTSTRAP_BATCH = 1 << 22 # resampled indices drawn at a time by bootstrapMeans
+
 #csv_files = glob.glob('Raw Data/Measurements26Feb/*.csv')
 
 '''
@@ -29,89 +35,298 @@ for file in csv_files:
 '''
 
 
-def findLinGraph(folderStr : str, lowestTemp, highestTemp, increment, samples, celsius:bool):
-    # Returns calibrated 1/T and lnV arrays
- # PUT FOLDER DIRECTORY FROM PROJECT CONTEXT IN folderStr e.g 'Raw Data/Measurements26Feb/'
- # DATA FILES MUST BE [TEMP].csv AND BLOCKED DATA FILES MUST BE [TEMP]B.csv e.g. "1300.csv" and "1300B.csv" IN ONE FOLDER
-    # samples is the amount of data points to take for the calibration
-    #increment is the temperature step between each calibration measurement
+def readCalibrationColumn(filePath, samples):
+    # Reads only the voltage column and the rows that go into the average.
+    # loc[:samples] includes row [samples], so that is samples+1 rows.
+    return pd.read_csv(filePath, usecols=["Dev1/ai0"], nrows=samples+1)["Dev1/ai0"]
+
+def readCalibrationPair(filePath, filePathBlocked, samples):
+    # Returns the dark-subtracted average voltage of one set point
+    # Read set of data and blocked data
+    voltage = readCalibrationColumn(filePath, samples)
+    voltageBlocked = readCalibrationColumn(filePathBlocked, samples)
 
-    voltages = []
-    temps = []
+    # calculate the average of each set
+    avg = average(voltage)
+    avgBlocked = average(voltageBlocked)
+    return avg-avgBlocked
 
-    for temperature in range(lowestTemp,highestTemp+1,increment):
+def calibrationPoints(folderStr : str, lowestTemp, highestTemp, increment, samples, useCache=True, workers=None):
+    # Returns the set temperatures and dark-subtracted average voltages of a calibration folder.
+    # Averages are kept in the folder's cache file, only pairs whose files changed are read again,
+    # and those are read concurrently (workers threads, default one per pair up to 8).
+    cache = CalibrationCache(folderStr) if useCache else None
+    temps = list(range(lowestTemp,highestTemp+1,increment))
+    voltages = [None] * len(temps)
+    toRead = []
+
+    for i, temperature in enumerate(temps):
         filePath = folderStr+'/'+str(temperature)+".csv" # string e.g "Raw Data/Measurements26Feb/1300.csv"
         filePathBlocked = folderStr+'/'+str(temperature)+"B.csv" # string e.g "Raw Data/Measurements26Feb/1300B.csv"
+        if cache:
+            voltages[i] = cache.get(temperature, samples, filePath, filePathBlocked)
+        if voltages[i] is None:
+            toRead.append((i, filePath, filePathBlocked))
 
-        # Read set of data and blocked data
-        df = pd.read_csv(filePath)
-        dfBlocked = pd.read_csv(filePathBlocked)
+    if toRead:
+        with ThreadPoolExecutor(max_workers=workers or min(8, len(toRead))) as pool:
+            results = pool.map(lambda job: readCalibrationPair(job[1], job[2], samples), toRead)
+            for (i, filePath, filePathBlocked), voltage in zip(toRead, results):
+                voltages[i] = voltage
+                if cache:
+                    cache.put(temps[i], samples, filePath, filePathBlocked, voltage)
 
-        # calculate the average of each set
-        avg = average(df.loc[:samples, "Dev1/ai0"])
-        avgBlocked = average(dfBlocked.loc[:samples, "Dev1/ai0"])
-        print(temperature, avg-avgBlocked)
-        voltages.append(avg-avgBlocked)
+    for temperature, voltage in zip(temps, voltages):
+        print(temperature, voltage)
 
-        if celsius:
-            temps.append(temperature+273.15)
-        else:
-            temps.append(temperature)
+    if cache:
+        cache.save()
+    return temps, voltages
+
+def findLinGraph(folderStr : str, lowestTemp, highestTemp, increment, samples, celsius:bool, useCache=True):
+    # Returns calibrated 1/T and lnV arrays
+ # PUT FOLDER DIRECTORY FROM PROJECT CONTEXT IN folderStr e.g 'Raw Data/Measurements26Feb/'
+ # DATA FILES MUST BE [TEMP].csv AND BLOCKED DATA FILES MUST BE [TEMP]B.csv e.g. "1300.csv" and "1300B.csv" IN ONE FOLDER
+    # samples is the amount of data points to take for the calibration
+    #increment is the temperature step between each calibration measurement
+
+    temps, voltages = calibrationPoints(folderStr, lowestTemp, highestTemp, increment, samples, useCache)
+    if celsius:
+        temps = [temperature+273.15 for temperature in temps]
 
     m, c = polyfit(listRcp(temps), listLn(voltages), 1)
     print("m =",m,"c =",c, "Mean Eff. Wavelength:", -(0.014388/m))
     return listRcp(temps),listLn(voltages)
 
-def findLinParams(folderStr : str, lowestTemp : int, highestTemp: int, increment, samples, celsius:bool):
+def findLinParams(folderStr : str, lowestTemp : int, highestTemp: int, increment, samples, celsius:bool, useCache=True):
     # Returns m and C values of calibrated lnV against 1/T graph.
  # PUT FOLDER DIRECTORY FROM PROJECT CONTEXT IN folderStr e.g 'Raw Data/Measurements26Feb/'
  # DATA FILES MUST BE [TEMP].csv AND BLOCKED DATA FILES MUST BE [TEMP]B.csv e.g. "1300.csv" and "1300B.csv" IN ONE FOLDER
 
-    voltages = []
-    temps = []
+    temps, voltages = calibrationPoints(folderStr, lowestTemp, highestTemp, increment, samples, useCache)
+    if celsius:
+        temps = [temperature+273.15 for temperature in temps]
 
-    for temperature in range(lowestTemp,highestTemp+1,increment):
-        filePath = folderStr+'/'+str(temperature)+".csv" # string e.g "Raw Data/Measurements26Feb/1300.csv"
-        filePathBlocked = folderStr+'/'+str(temperature)+"B.csv" # string e.g "Raw Data/Measurements26Feb/1300B.csv"
+    m, c = polyfit(listRcp(temps), listLn(voltages), 1)
+    print("m =",m,"c =",c, "Mean Eff. Wavelength:", -(0.014388/m))
+    return m,c
 
-        # Read set of data and blocked data
-        df = pd.read_csv(filePath)
-        dfBlocked = pd.read_csv(filePathBlocked)
+def calibrationSamples(folderStr, lowestTemp, highestTemp, increment, samples, workers=None):
+    # Raw voltages of every set point, the same rows calibrationPoints averages.
+    # Returns (temps, [signal arrays], [blocked arrays]).
+    temps = list(range(lowestTemp,highestTemp+1,increment))
+    paths = []
+    for temperature in temps:
+        paths.append(folderStr+'/'+str(temperature)+".csv")
+        paths.append(folderStr+'/'+str(temperature)+"B.csv")
+    with ThreadPoolExecutor(max_workers=workers or min(8, len(paths))) as pool:
+        columns = list(pool.map(lambda path: readCalibrationColumn(path, samples).to_numpy(dtype=np.float64), paths))
+    return temps, columns[0::2], columns[1::2]
 
-        # calculate the average of each set
-        avg = average(df.loc[:samples, "Dev1/ai0"])
-        avgBlocked = average(dfBlocked.loc[:samples, "Dev1/ai0"])
-        print(temperature, avg-avgBlocked)
-        voltages.append(avg-avgBlocked)
+def bootstrapMeans(values, replicates, rng, batchSize=BOOTSTRAP_BATCH):
+    # Means of replicates resamples (with replacement) of values, resampled in batches of
+    # about batchSize drawn indices so memory stays bounded for any number of replicates
+    n = len(values)
+    if n == 0:
+        raise ValueError("Can't bootstrap the mean of no samples")
+    means = np.empty(replicates)
+    rows = max(1, batchSize // n)
+    for first in range(0, replicates, rows):
+        count = min(rows, replicates - first)
+        index = rng.integers(0, n, size=(count, n))
+        np.mean(values[index], axis=1, out=means[first:first + count])
+    return means
 
-        if celsius:
-            temps.append(temperature+273.15)
-        else:
-            temps.append(temperature)
+def linearFits(x, Y):
+    # Least squares y = m*x + c of every row of Y against the same x, closed form so all rows fit at once.
+    # Same line polyfit(x, y, 1) gives. Returns (m, c) arrays.
+    x = np.asarray(x, dtype=np.float64)
+    dx = x - x.mean()
+    m = (Y - Y.mean(axis=1, keepdims=True)) @ dx / (dx @ dx)
+    c = Y.mean(axis=1) - m * x.mean()
+    return m, c
 
+def bootstrapLinParams(folderStr : str, lowestTemp : int, highestTemp: int, increment, samples, celsius:bool,
+                       replicates=2000, confidence=0.95, seed=None, workers=None):
+    # Confidence intervals of m, c and the mean effective wavelength by bootstrapping the raw samples.
+    # Every replicate resamples each set point's signal and blocked samples with replacement, takes the
+    # dark-subtracted average like calibrationPoints and refits lnV against 1/T. All replicates are fitted
+    # at once. Replicates with a non-positive voltage (no log) are dropped and counted; ValueError if
+    # none are left.
+    # Returns a dict: m, c, wavelength (fit of the original data, same as findLinParams), their
+    # [low, high] percentile intervals and standard errors, and the replicates used.
+    temps, signals, blocked = calibrationSamples(folderStr, lowestTemp, highestTemp, increment, samples, workers)
+    if celsius:
+        temps = [temperature+273.15 for temperature in temps]
+    x = 1/np.asarray(temps, dtype=np.float64)
 
-    m, c = polyfit(listRcp(temps), listLn(voltages), 1)
-    print("m =",m,"c =",c, "Mean Eff. Wavelength:", -(0.014388/m))
-    return m,c
+    rng = np.random.default_rng(seed)
+    voltages = np.empty((replicates, len(temps)))
+    for i, (signal, dark) in enumerate(zip(signals, blocked)):
+        voltages[:, i] = bootstrapMeans(signal, replicates, rng) - bootstrapMeans(dark, replicates, rng)
+    valid = (voltages > 0).all(axis=1)
+    if not valid.any():
+        raise ValueError(f"No usable bootstrap replicates: all {replicates} have a set point at or below "
+                         "its blocked reading")
+    mBoot, cBoot = linearFits(x, np.log(voltages[valid]))
+    wavelengthBoot = -(0.014388/mBoot)
 
-def voltToTemp(vArr, m, c, celsius):
-    temp = []
+    original = np.array([[signal.mean() - dark.mean() for signal, dark in zip(signals, blocked)]])
+    m, c = linearFits(x, np.log(original))
+    m, c = float(m[0]), float(c[0])
+    tail = (1 - confidence) / 2 * 100
+    interval = lambda values: [float(v) for v in np.percentile(values, [tail, 100 - tail])]
+    result = {
+        'm': m, 'c': c, 'wavelength': -(0.014388/m),
+        'm_interval': interval(mBoot), 'c_interval': interval(cBoot), 'wavelength_interval': interval(wavelengthBoot),
+        'm_std': float(mBoot.std(ddof=1)), 'c_std': float(cBoot.std(ddof=1)),
+        'wavelength_std': float(wavelengthBoot.std(ddof=1)),
+        'confidence': confidence, 'replicates': int(valid.sum()), 'dropped': int(replicates - valid.sum()),
+    }
+    print("m =",m,"±",result['m_std'],result['m_interval'],"c =",c,"±",result['c_std'],result['c_interval'])
+    print("Mean Eff. Wavelength:",result['wavelength'],result['wavelength_interval'],
+          f"({confidence:.0%} interval, {result['replicates']} replicates)")
+    return result
+
+def readCalFile(filePath):
+    # Reads a .cal file saved by GUI2 (key=value lines: gradient, y_intercept, units).
+    # Returns (m, c, units), units is None if the file doesn't say.
+    params = {}
+    with open(filePath, 'r') as f:
+        for line in f:
+            if line.strip():
+                key, value = line.strip().split('=')
+                params[key] = value
+    return float(params['gradient']), float(params['y_intercept']), params.get('units')
+
+class CalibrationSet:
+    # One calibration run read once, refitted over any set of its temperatures without touching disk again.
+    # Each point keeps its regression terms (1, x, y, xx, xy, yy) of lnV = m/T + c with x = 1/T (K) and
+    # y = lnV. A fit of any subset is the closed form of the summed terms, and leave-one-out fits are the
+    # total minus each point's terms, all at once. x is stored relative to the mean 1/T of the run so the
+    # sums don't lose precision to cancellation.
+
+    def __init__(self, temps, voltages, celsius=True):
+        self.temps = np.asarray(temps, dtype=np.float64) # as given, °C if celsius
+        self.voltages = np.asarray(voltages, dtype=np.float64)
+        self.kelvin = self.temps + 273.15 if celsius else self.temps
+        self.celsius = celsius
+        self.x = 1/self.kelvin
+        self.y = np.log(self.voltages)
+        self.x0 = self.x.mean()
+        xc = self.x - self.x0
+        self.terms = np.column_stack((np.ones_like(xc), xc, self.y, xc*xc, xc*self.y, self.y*self.y))
+
+    @classmethod
+    def fromFolder(cls, folderStr, lowestTemp, highestTemp, increment, samples, celsius=True, useCache=True):
+        temps, voltages = calibrationPoints(folderStr, lowestTemp, highestTemp, increment, samples, useCache)
+        return cls(temps, voltages, celsius)
+
+    def select(self, lowestTemp=None, highestTemp=None, exclude=()):
+        # boolean mask of the points in [lowestTemp, highestTemp] (units of temps) not in exclude
+        mask = np.ones(len(self.temps), dtype=bool)
+        if lowestTemp is not None:
+            mask &= self.temps >= lowestTemp
+        if highestTemp is not None:
+            mask &= self.temps <= highestTemp
+        for temperature in exclude:
+            mask &= self.temps != temperature
+        return mask
+
+    def _solve(self, sums):
+        # (m, c) from summed terms, sums can be one row or many
+        n, sx, sy, sxx, sxy = (sums[..., i] for i in range(5))
+        m = (n*sxy - sx*sy)/(n*sxx - sx*sx)
+        c = (sy - m*sx)/n - m*self.x0
+        return m, c
+
+    def fit(self, lowestTemp=None, highestTemp=None, exclude=()):
+        # (m, c) of the points in the range, the same line findLinParams fits over that range
+        mask = self.select(lowestTemp, highestTemp, exclude)
+        if mask.sum() < 2:
+            raise ValueError("A fit needs at least two calibration points")
+        m, c = self._solve(self.terms[mask].sum(axis=0))
+        return float(m), float(c)
+
+    def leaveOneOut(self, lowestTemp=None, highestTemp=None):
+        # Fits with each point of the range left out in turn. Returns the temperatures, (m, c) arrays of
+        # each fit and the temperature error of the left-out point under its fit (predicted - set).
+        mask = self.select(lowestTemp, highestTemp)
+        if mask.sum() < 3:
+            raise ValueError("Leave-one-out needs at least three calibration points")
+        terms = self.terms[mask]
+        m, c = self._solve(terms.sum(axis=0) - terms)
+        predicted = m/(self.y[mask] - c)
+        return self.temps[mask], m, c, predicted - self.kelvin[mask]
+
+    def predict(self, m, c, lowestTemp=None, highestTemp=None):
+        # temperatures T = m/(lnV - c) of the points in the range, in the units of temps
+        mask = self.select(lowestTemp, highestTemp)
+        kelvin = m/(self.y[mask] - c)
+        return kelvin - 273.15 if self.celsius else kelvin
+
+    def residuals(self, m, c, lowestTemp=None, highestTemp=None):
+        # lnV - (m/T + c) of the points in the range
+        mask = self.select(lowestTemp, highestTemp)
+        return self.y[mask] - (m*self.x[mask] + c)
+
+    def rSquared(self, m, c, lowestTemp=None, highestTemp=None):
+        mask = self.select(lowestTemp, highestTemp)
+        y = self.y[mask]
+        return 1 - (self.residuals(m, c, lowestTemp, highestTemp)**2).sum()/((y - y.mean())**2).sum()
+
+    def tempErrors(self, m, c, lowestTemp=None, highestTemp=None):
+        # predicted - set temperature of the points in the range (the same in °C and K)
+        mask = self.select(lowestTemp, highestTemp)
+        return self.predict(m, c, lowestTemp, highestTemp) - self.temps[mask]
+
+    def report(self, lowestTemp=None, highestTemp=None):
+        # fit of the range with its per-point errors and leave-one-out errors, printed and returned
+        m, c = self.fit(lowestTemp, highestTemp)
+        mask = self.select(lowestTemp, highestTemp)
+        errors = self.tempErrors(m, c, lowestTemp, highestTemp)
+        looErrors = self.leaveOneOut(lowestTemp, highestTemp)[3] if mask.sum() >= 3 else np.full(mask.sum(), np.nan)
+        r2 = self.rSquared(m, c, lowestTemp, highestTemp)
+        print("m =",m,"c =",c, "Mean Eff. Wavelength:", -(0.014388/m), "R^2 =", r2)
+        print("Temp  Error  LOO error")
+        for temperature, error, looError in zip(self.temps[mask], errors, looErrors):
+            print(f"{temperature:g}  {error:.3f}  {looError:.3f}")
+        return {'m': m, 'c': c, 'wavelength': -(0.014388/m), 'r_squared': r2, 'temps': self.temps[mask],
+                'errors': errors, 'loo_errors': looErrors}
+
+def voltToTempArr(vArr, m, c, celsius, out=None, dtype=np.float64):
+    # Vectorised T = m/(lnV - c) over a whole array, returns an ndarray.
+    # out can be a preallocated buffer (its dtype then wins over dtype), use np.float32 to halve memory.
+    # Non-positive voltages give nan instead of raising like math.log does.
+    if out is not None:
+        dtype = out.dtype
+    v = np.asarray(vArr, dtype=dtype)
+    if out is None:
+        out = np.empty(v.shape, dtype=dtype)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.log(v, out=out)
+        np.subtract(out, c, out=out)
+        np.divide(m, out, out=out) ## from equation T = m/(lnV - c)
+    if v.size and v.min() <= 0:
+        np.copyto(out, np.nan, where=(v <= 0)) # ln(0) = -inf would otherwise come out as 0 K
     if celsius:
-        for i in range(len(vArr)):
-            temp.append(m/(math.log(vArr[i]) - c) - 273.15) ## from equation T = m/(lnV - c)
-    else:
-        for i in range(len(vArr)):
-            temp.append(m/(math.log(vArr[i]) - c)) ## from equation T = m/(lnV - c)
-    return temp
+        np.subtract(out, 273.15, out=out)
+    return out
+
+def emisCompArr(vArr, emis, out=None, dtype=np.float64):
+    # Vectorised emissivity compensation V/emis, returns an ndarray
+    if out is not None:
+        dtype = out.dtype
+    v = np.asarray(vArr, dtype=dtype)
+    return np.divide(v, emis, out=out, dtype=dtype) # dtype also when emis is a float64 array per channel
+
+def voltToTemp(vArr, m, c, celsius):
+    # list version kept for the plotting scripts, use voltToTempArr for large captures
+    return voltToTempArr(vArr, m, c, celsius).tolist()
 
 def voltToEmis(vArr, m, c, celsius): #compares with emissivity 0 at T = 1300C
-    emis = []
-    for i in range(len(vArr)):
-        emis.append(vArr[i]/1.67931706328) ## V/V0
-    return average(emis)
+    return average(np.asarray(vArr, dtype=np.float64) / 1.67931706328) ## V/V0
 
 def emisComp(vArr, emis):
-    comped = []
-    for v in vArr:
-        comped.append(v/emis)
-    return comped
+    # list version kept for the plotting scripts, use emisCompArr for large captures
+    return emisCompArr(vArr, emis).tolist()
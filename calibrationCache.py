@@ -0,0 +1,67 @@
+import json
+import os
+
+# Stores the dark-subtracted average voltage of each [TEMP].csv/[TEMP]B.csv pair in the calibration folder,
+# so repeat calibrations over the same folder don't have to parse the CSV files again.
+# An entry is only reused while the path, size and modification time of both files and the samples count match.
+
+CACHE_NAME = ".calibration_cache.json"
+CACHE_VERSION = 1
+
+
+def fileSignature(filePath):
+    stat = os.stat(filePath)
+    return [os.path.abspath(filePath), stat.st_size, stat.st_mtime_ns]
+
+
+class CalibrationCache:
+    def __init__(self, folderStr):
+        self.path = os.path.join(folderStr, CACHE_NAME)
+        self.entries = self._load()
+        self.changed = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+            if stored.get("version") == CACHE_VERSION and isinstance(stored.get("entries"), dict):
+                return stored["entries"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass # missing or unreadable cache, start again
+        return {}
+
+    @staticmethod
+    def _key(temperature, samples):
+        return f"{temperature}:{samples}"
+
+    def get(self, temperature, samples, filePath, filePathBlocked):
+        # returns the cached voltage, or None if either file changed since it was stored
+        entry = self.entries.get(self._key(temperature, samples))
+        if not isinstance(entry, dict) or not isinstance(entry.get("voltage"), (int, float)):
+            return None # not stored, or not an entry this wrote
+        try:
+            signature = [fileSignature(filePath), fileSignature(filePathBlocked)]
+        except OSError:
+            return None
+        if entry.get("files") != signature:
+            return None
+        return entry["voltage"]
+
+    def put(self, temperature, samples, filePath, filePathBlocked, voltage):
+        self.entries[self._key(temperature, samples)] = {
+            "files": [fileSignature(filePath), fileSignature(filePathBlocked)],
+            "voltage": float(voltage)
+        }
+        self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        tmpPath = self.path + ".tmp"
+        try:
+            with open(tmpPath, 'w') as f:
+                json.dump({"version": CACHE_VERSION, "entries": self.entries}, f)
+            os.replace(tmpPath, self.path) # never leave a half written cache behind
+            self.changed = False
+        except OSError:
+            pass # read-only folder, calibration still works without the cache
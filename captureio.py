@@ -0,0 +1,240 @@
+import os
+import time as clock
+
+import numpy as np
+import pandas as pd
+
+from profiling import profiler
+from timeparse import TimestampParser, NS_PER_S
+
+# Loading of DAQ capture files into compact time/voltage arrays.
+#
+# Binary captures (.irc) are what the live monitor records: a HEADER_BYTES header (HEADER_DTYPE, little
+# endian) with the start time, sample rate, channel names and each channel's calibration, then frames of
+# one sample per channel, appended as they are acquired. The sample count follows from the file size, so
+# a recording can be opened while it is still being written and a crash only loses a partial last frame.
+# openCapture maps the frames with np.memmap, nothing is read until it is used.
+
+CHUNK_ROWS = 1 << 18 # rows parsed at a time, bounds the memory used on top of the output arrays
+SNIFF_BYTES = 1 << 16 # bytes read from the start of the file to estimate the row count
+TRIM_SLACK = 0.05 # unused fraction of the preallocation handed back as a view rather than copied away
+
+CAPTURE_EXTENSION = ".irc"
+CAPTURE_MAGIC = b"IRCAP"
+CAPTURE_VERSION = 1
+MAX_CHANNELS = 16
+HEADER_BYTES = 1024
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('channels', '<u4'),
+    ('sampleRate', '<f8'),
+    ('startTime', '<f8'), # Unix time of the first sample
+    ('dtype', 'S8'), # of the samples, e.g. '<f4'
+    ('units', 'S1'), # units the calibration was made in, C or K
+    ('names', 'S32', (MAX_CHANNELS,)),
+    ('gradient', '<f8', (MAX_CHANNELS,)), # nan where a channel has no calibration
+    ('intercept', '<f8', (MAX_CHANNELS,)),
+    ('emissivity', '<f8', (MAX_CHANNELS,)),
+])
+
+
+def estimateRows(filePath):
+    # rough row count from the line density of the start of the file, used to preallocate
+    size = os.path.getsize(filePath)
+    with open(filePath, 'rb') as f:
+        head = f.read(SNIFF_BYTES)
+    lines = head.count(b'\n')
+    if lines == 0 or len(head) >= size:
+        return max(lines, 1)
+    return int(size * lines / len(head) * 1.02) + 1
+
+
+def readCapture(filePath, chunkSize=CHUNK_ROWS, dtype=np.float64):
+    # Streams a capture CSV (time in the first column, voltage in the second) chunk by chunk and returns
+    # (time in seconds from the first sample, voltage) as ndarrays. Only these two arrays are kept,
+    # the DataFrame of each chunk is dropped as soon as it has been converted.
+    capacity = estimateRows(filePath)
+    time = np.empty(capacity, dtype=np.float64)
+    voltage = np.empty(capacity, dtype=dtype)
+    parser = TimestampParser()
+    n = 0
+
+    chunks = iter(pd.read_csv(filePath, usecols=[0, 1], chunksize=chunkSize))
+    while True:
+        with profiler.stage('csv'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        rows = len(chunk)
+        if n + rows > capacity:
+            # estimate was short, grow by half again rather than doubling
+            capacity = max(n + rows, int(capacity * 1.5))
+            time = _grown(time, n, capacity)
+            voltage = _grown(voltage, n, capacity)
+        with profiler.stage('timestamps', rows):
+            np.divide(parser.parse(chunk.iloc[:, 0].to_numpy()), NS_PER_S, out=time[n:n + rows])
+        voltage[n:n + rows] = chunk.iloc[:, 1].to_numpy()
+        n += rows
+    if profiler.enabled:
+        profiler.add('csv', 0.0, n, calls=0) # rows, so the csv stage gets a throughput too
+
+    # a slice when the estimate was close, a copy to free the tail when it was well over
+    if n < len(time) * (1 - TRIM_SLACK):
+        return time[:n].copy(), voltage[:n].copy()
+    return time[:n], voltage[:n]
+
+
+def _grown(array, used, capacity):
+    # new buffer with the first used values copied over; resize() in place would break views of the old one
+    grown = np.empty(capacity, dtype=array.dtype)
+    grown[:used] = array[:used]
+    return grown
+
+
+class CaptureWriter:
+    # Appends (channels, samples) blocks of raw voltage to a binary capture as they are acquired.
+    # calibration is one (gradient, intercept, emissivity) per channel, or None.
+
+    def __init__(self, filePath, sampleRate, names, calibration=None, units='C', startTime=None, dtype=np.float32):
+        names = [names] if isinstance(names, str) else list(names)
+        if not 1 <= len(names) <= MAX_CHANNELS:
+            raise ValueError(f"A capture holds 1 to {MAX_CHANNELS} channels")
+        self.channels = len(names)
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        header = np.zeros((), dtype=HEADER_DTYPE)
+        header['magic'] = CAPTURE_MAGIC
+        header['version'] = CAPTURE_VERSION
+        header['channels'] = self.channels
+        header['sampleRate'] = sampleRate
+        header['startTime'] = clock.time() if startTime is None else startTime
+        header['dtype'] = self.dtype.str.encode()
+        header['units'] = units.encode()
+        header['names'][:self.channels] = [name.encode() for name in names]
+        for field in ('gradient', 'intercept', 'emissivity'):
+            header[field] = np.nan
+        if calibration is not None:
+            header['gradient'][:self.channels], header['intercept'][:self.channels], \
+                header['emissivity'][:self.channels] = np.asarray(calibration, dtype=np.float64).reshape(-1, 3).T
+        self.filePath = filePath
+        self.file = open(filePath, 'wb')
+        self.file.write(header.tobytes().ljust(HEADER_BYTES, b'\0'))
+        self.samples = 0
+
+    def append(self, block):
+        block = np.asarray(block).reshape(self.channels, -1)
+        self.file.write(np.ascontiguousarray(block.T, dtype=self.dtype)) # frames: channel values side by side
+        self.samples += block.shape[-1]
+
+    def flush(self):
+        self.file.flush()
+
+    def sync(self):
+        # flush, then wait until the OS has the data on disk
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def readCaptureHeader(filePath):
+    # header of a binary capture as a dict, with the number of complete frames written so far
+    with open(filePath, 'rb') as f:
+        raw = f.read(HEADER_DTYPE.itemsize)
+    if len(raw) < HEADER_DTYPE.itemsize or not raw.startswith(CAPTURE_MAGIC):
+        raise ValueError(f"{filePath} is not a binary capture")
+    header = np.frombuffer(raw, dtype=HEADER_DTYPE)[0]
+    if header['version'] > CAPTURE_VERSION:
+        raise ValueError(f"{filePath} is a newer capture version ({header['version']})")
+    channels = int(header['channels'])
+    dtype = np.dtype(header['dtype'].decode())
+    return {
+        'channels': channels,
+        'sampleRate': float(header['sampleRate']),
+        'startTime': float(header['startTime']),
+        'dtype': dtype,
+        'units': header['units'].decode(),
+        'names': [name.decode() for name in header['names'][:channels]],
+        'calibration': [tuple(float(header[field][i]) for field in ('gradient', 'intercept', 'emissivity'))
+                        for i in range(channels)],
+        'samples': (os.path.getsize(filePath) - HEADER_BYTES) // (channels * dtype.itemsize),
+    }
+
+
+def openCapture(filePath):
+    # (header, (samples, channels) array mapped from the file), pages are read as they are touched
+    header = readCaptureHeader(filePath)
+    shape = (header['samples'], header['channels'])
+    if header['samples'] == 0:
+        return header, np.empty(shape, dtype=header['dtype']) # np.memmap can't map zero bytes
+    return header, np.memmap(filePath, dtype=header['dtype'], mode='r', offset=HEADER_BYTES, shape=shape)
+
+
+class CaptureChannel:
+    # One channel of a binary capture, mapped on first use and sized when opened, so it doesn't grow while
+    # the file is still being recorded. Pickles as its file and channel: a worker process maps the file
+    # itself rather than being sent a copy of the samples.
+
+    def __init__(self, filePath, channel, samples):
+        self.filePath = filePath
+        self.channel = channel
+        self.samples = samples
+        self._column = None
+
+    def column(self):
+        if self._column is None:
+            self._column = openCapture(self.filePath)[1][:self.samples, self.channel]
+        return self._column
+
+    @property
+    def dtype(self):
+        return self.column().dtype
+
+    def __len__(self):
+        return self.samples
+
+    def __getitem__(self, index):
+        return self.column()[index]
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.column(), dtype=dtype)
+
+    def __getstate__(self):
+        return {'filePath': self.filePath, 'channel': self.channel, 'samples': self.samples}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._column = None
+
+
+class SampleClock:
+    # Times in seconds of uniformly sampled data, i / sampleRate, made only for the range asked for
+    # so a long recording's time column takes no memory.
+
+    def __init__(self, samples, sampleRate):
+        self.samples = samples
+        self.sampleRate = sampleRate
+
+    def __len__(self):
+        return self.samples
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return np.arange(*index.indices(self.samples)) / self.sampleRate
+        if index < 0:
+            index += self.samples
+        if not 0 <= index < self.samples:
+            raise IndexError("sample index out of range")
+        return index / self.sampleRate
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self[:], dtype=dtype)
+
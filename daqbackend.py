@@ -0,0 +1,191 @@
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+try:
+    import nidaqmx
+    from nidaqmx.constants import TerminalConfiguration, AcquisitionType
+    from nidaqmx.stream_readers import AnalogMultiChannelReader
+except ImportError:
+    nidaqmx = None # simulated backend still works without the NI drivers
+
+# Where the acquisition thread gets its samples from. A backend is opened with its channels (one
+# physical channel name or a list of them, all in one task), rate and chunk size, started, then
+# readInto() blocks until it has filled the (channels, samples) buffer it is given (like nidaqmx's
+# read_many_sample) and returns the number of samples per channel written.
+
+# Calibration of the Measurements26Feb data (600-1300 °C, 500 samples), used to turn simulated
+# temperatures into realistic detector voltages
+SIM_GRADIENT = -15614.906912446226
+SIM_INTERCEPT = 10.486003639238815
+
+
+def channelList(channels):
+    return [channels] if isinstance(channels, str) else list(channels)
+
+
+class DaqBackend(ABC):
+    # a backend missing any of these can't be created, rather than failing partway through an acquisition
+    channelCount = 1
+
+    @abstractmethod
+    def open(self, channels, sampleRate, samplesPerChunk):
+        pass
+
+    @abstractmethod
+    def start(self):
+        pass
+
+    @abstractmethod
+    def readInto(self, buffer, timeout):
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+
+class NidaqmxBackend(DaqBackend):
+    # A real NI device through nidaqmx, differential inputs sampled together in one task, continuous sampling
+
+    def __init__(self):
+        self.task = None
+        self.reader = None
+
+    def open(self, channels, sampleRate, samplesPerChunk):
+        if nidaqmx is None:
+            raise RuntimeError("nidaqmx is not installed, only the simulated device is available")
+        channels = channelList(channels)
+        self.channelCount = len(channels)
+        self.task = nidaqmx.Task()
+        for channel in channels:
+            self.task.ai_channels.add_ai_voltage_chan(
+                channel,
+                terminal_config=TerminalConfiguration.DIFF
+            )
+        self.task.timing.cfg_samp_clk_timing(
+            rate=sampleRate,
+            sample_mode=AcquisitionType.CONTINUOUS,
+            samps_per_chan=max(10 * samplesPerChunk, int(sampleRate)) # at least a second of DAQ buffer
+        )
+
+    def start(self):
+        self.reader = AnalogMultiChannelReader(self.task.in_stream)
+        self.task.start()
+
+    def readInto(self, buffer, timeout):
+        return self.reader.read_many_sample(buffer, number_of_samples_per_channel=buffer.shape[-1], timeout=timeout)
+
+    def close(self):
+        if self.task:
+            self.task.close() # also unblocks a read in progress
+            self.task = None
+
+
+class SimulatedBackend(DaqBackend):
+    # Software device producing detector voltages in real time, paced by the wall clock.
+    #   'plateau'  blackbody held at temperature, with detector noise
+    #   'chopper'  the plateau cut by a chopper wheel into a square wave, like Raw Data/chopperSquare.csv
+    #   'step'     furnace stepping through stepTemps, holding each for stepPeriod seconds
+    # Samples the reader doesn't collect within bufferSeconds are dropped like an overflowing DAQ
+    # buffer and counted in droppedSamples, so throughput can be measured without hardware.
+    # With several channels each one sees its own detector, channelSpacing °C hotter than the one before
+    # (or the temperatures in channelTemperatures), with independent noise.
+
+    def __init__(self, signal='plateau', temperature=1000.0, noise=0.004, darkVoltage=0.005,
+                 chopperFrequency=220.0, stepTemps=(600, 700, 800, 900, 1000, 1100, 1200, 1300), stepPeriod=5.0,
+                 gradient=SIM_GRADIENT, intercept=SIM_INTERCEPT, bufferSeconds=1.0, seed=None,
+                 channelSpacing=25.0, channelTemperatures=None):
+        if signal not in ('plateau', 'chopper', 'step'):
+            raise ValueError(f"Unknown simulated signal: {signal}")
+        self.signal = signal
+        self.temperature = temperature # °C
+        self.noise = noise # relative noise on the detector voltage
+        self.darkVoltage = darkVoltage
+        self.chopperFrequency = chopperFrequency
+        self.stepTemps = np.asarray(stepTemps, dtype=np.float64)
+        self.stepPeriod = stepPeriod
+        self.gradient = gradient
+        self.intercept = intercept
+        self.bufferSeconds = bufferSeconds
+        self.rng = np.random.default_rng(seed)
+        self.channelSpacing = channelSpacing
+        self.channelTemperatures = channelTemperatures
+        self.sampleRate = None
+        self.produced = 0 # index of the next sample handed to the reader
+        self.droppedSamples = 0
+        self.startTime = None
+        self.closed = False
+
+    def open(self, channels, sampleRate, samplesPerChunk):
+        self.channelCount = len(channelList(channels))
+        if self.channelTemperatures is not None:
+            offsets = np.asarray(self.channelTemperatures, dtype=np.float64)[:self.channelCount] - self.temperature
+        else:
+            offsets = np.arange(self.channelCount) * self.channelSpacing
+        self.offsets = offsets[:, None] # °C added to each channel's temperature
+        self.sampleRate = float(sampleRate)
+        self.bufferSize = max(10 * samplesPerChunk, int(self.sampleRate * self.bufferSeconds))
+
+    def start(self):
+        self.startTime = time.perf_counter()
+        self.produced = 0
+        self.droppedSamples = 0
+        self.closed = False
+
+    def voltageAt(self, temperature):
+        # detector voltage for a temperature in °C, from lnV = m/T + c
+        return np.exp(self.gradient / (np.asarray(temperature) + 273.15) + self.intercept)
+
+    def generate(self, index):
+        # (channels, samples) voltages for the sample indices in index
+        t = index / self.sampleRate
+        if self.signal == 'step':
+            step = (t // self.stepPeriod).astype(np.int64) % len(self.stepTemps)
+            volts = self.voltageAt(self.stepTemps[step] + self.offsets)
+        else:
+            volts = np.broadcast_to(self.voltageAt(self.temperature + self.offsets), (self.channelCount, len(index)))
+        volts = volts * (1 + self.noise * self.rng.standard_normal((self.channelCount, len(index))))
+        if self.signal == 'chopper':
+            blocked = np.broadcast_to((t * self.chopperFrequency) % 1.0 >= 0.5, volts.shape)
+            volts[blocked] = self.darkVoltage + self.darkVoltage * self.rng.standard_normal(np.count_nonzero(blocked))
+        return volts
+
+    def readInto(self, buffer, timeout):
+        n = buffer.shape[-1]
+        deadline = time.perf_counter() + timeout
+        while True:
+            if self.closed:
+                raise RuntimeError("Simulated device closed")
+            available = int((time.perf_counter() - self.startTime) * self.sampleRate) - self.produced
+            if available > self.bufferSize:
+                # reader too slow, the oldest samples are gone like a DAQ buffer overflow
+                self.droppedSamples += available - self.bufferSize
+                self.produced += available - self.bufferSize
+                available = self.bufferSize
+            if available >= n:
+                break
+            wait = (n - available) / self.sampleRate
+            if time.perf_counter() + wait > deadline:
+                raise TimeoutError(f"Simulated device: {n} samples not available within {timeout} s")
+            time.sleep(min(wait, 0.05))
+
+        buffer[:] = self.generate(np.arange(self.produced, self.produced + n))
+        self.produced += n
+        return n
+
+    def close(self):
+        self.closed = True
+
+
+BACKENDS = {
+    "NI-DAQmx": NidaqmxBackend,
+    "Simulated plateau": lambda: SimulatedBackend('plateau'),
+    "Simulated chopper": lambda: SimulatedBackend('chopper'),
+    "Simulated step": lambda: SimulatedBackend('step'),
+}
+
+
+def createBackend(name):
+    return BACKENDS[name]()
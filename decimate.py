@@ -0,0 +1,91 @@
+import numpy as np
+
+# Min/max decimation for plotting. A line drawn into a w pixel wide axes can't show more than the lowest
+# and highest sample of each pixel column, so each series is cut down to the min and max of w bins of
+# the visible x-range. Spikes and chopper edges stay visible and draw time no longer grows with the data.
+
+
+def minMaxDecimate(x, y, bins, xRange=None):
+    # Returns (x, y) reduced to at most 2*bins points, the min and max of each bin in their original order.
+    # x must be sorted. With xRange=(x0, x1) only that span is kept, plus one point either side so the
+    # line still runs off the edges of the axes.
+    # y can also be (channels, samples) on the shared x: every channel is reduced in the same pass and
+    # x, y come back as (channels, points), each row picked by its own channel's extremes.
+    x = np.asarray(x)
+    y = np.asarray(y)
+    start, stop = 0, len(x)
+    if xRange is not None and len(x):
+        start = max(int(np.searchsorted(x, xRange[0], side='left')) - 1, 0)
+        stop = min(int(np.searchsorted(x, xRange[1], side='right')) + 1, len(x))
+    n = stop - start
+    bins = max(int(bins), 1)
+    if n <= 2 * bins:
+        if y.ndim == 2:
+            return np.broadcast_to(x[start:stop], (len(y), n)), y[:, start:stop]
+        return x[start:stop], y[start:stop]
+
+    # equal sample counts per bin, same as equal width for the uniformly sampled captures
+    per = -(-n // bins) # ceil
+    full = n // per
+    body = y[..., start:start + full * per].reshape(y.shape[:-1] + (full, per))
+    offsets = np.arange(full) * per + start
+    lo = np.argmin(body, axis=-1) + offsets
+    hi = np.argmax(body, axis=-1) + offsets
+    index = np.empty(y.shape[:-1] + (2 * full,), dtype=np.int64)
+    index[..., 0::2] = np.minimum(lo, hi)
+    index[..., 1::2] = np.maximum(lo, hi)
+
+    if full * per < n:
+        tail = y[..., start + full * per:stop]
+        tailStart = start + full * per
+        a = np.argmin(tail, axis=-1) + tailStart
+        b = np.argmax(tail, axis=-1) + tailStart
+        index = np.concatenate((index, np.minimum(a, b)[..., None], np.maximum(a, b)[..., None]), axis=-1)
+
+    return x[index], np.take_along_axis(y, index, axis=-1)
+
+
+class DecimatedPlot:
+    # Keeps the full series of each line on an Axes and only hands matplotlib a min/max reduction sized
+    # to the axes pixel width. The reduction is redone for the visible range on zoom/pan and on resize.
+    # Axes.clear() drops the xlim callback, so make a new DecimatedPlot after clearing (disconnect the old one).
+    # yOffset is added to what is drawn only (e.g. -273.15 to show Kelvin data in °C), the series are kept as given.
+
+    def __init__(self, axes, yOffset=0.0):
+        self.axes = axes
+        self.yOffset = yOffset
+        self.series = [] # (line, x, y)
+        self._limitsCid = axes.callbacks.connect('xlim_changed', self._onLimits)
+        self._resizeCid = axes.figure.canvas.mpl_connect('resize_event', self._onResize)
+
+    def pixelWidth(self):
+        width = int(self.axes.bbox.width)
+        return width if width > 0 else 1000
+
+    def plot(self, x, y, *args, **kwargs):
+        x = np.asarray(x)
+        y = np.asarray(y)
+        # first reduction over the whole series, min/max per bin keeps autoscaling the same as plotting it all
+        xd, yd = minMaxDecimate(x, y, self.pixelWidth())
+        line, = self.axes.plot(xd, yd + self.yOffset, *args, **kwargs)
+        self.series.append((line, x, y))
+        return line
+
+    def refresh(self):
+        xRange = self.axes.get_xlim()
+        bins = self.pixelWidth()
+        for line, x, y in self.series:
+            xd, yd = minMaxDecimate(x, y, bins, xRange)
+            line.set_data(xd, yd + self.yOffset)
+
+    def _onLimits(self, axes):
+        self.refresh()
+
+    def _onResize(self, event):
+        self.refresh()
+        self.axes.figure.canvas.draw_idle()
+
+    def disconnect(self):
+        self.axes.callbacks.disconnect(self._limitsCid)
+        self.axes.figure.canvas.mpl_disconnect(self._resizeCid)
+        self.series = []
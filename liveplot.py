@@ -0,0 +1,112 @@
+import numpy as np
+
+# Blitted live plotting. Lines are animated artists drawn over a cached background of the axes,
+# ticks and grid, so a normal frame is restore background + draw lines + blit. Axis limits only move
+# when the data leaves a margin band around them: y widens when a new sample falls outside, x jumps
+# ahead a page when the newest sample reaches the right edge. Only then is the whole figure redrawn.
+
+
+class LivePlot:
+    def __init__(self, canvas, xMargin=0.25, yMargin=0.1):
+        self.canvas = canvas
+        self.figure = canvas.figure
+        self.xMargin = xMargin # room left ahead of the newest sample, as a fraction of the span shown
+        self.yMargin = yMargin # room above and below the data, as a fraction of its range
+        self.axes = {} # axes -> limits and running min/max of the data drawn on it
+        self.background = None
+        self.needsLayout = True
+        self.fullDraws = 0 # frames that had to redraw everything, the rest were blits
+        self._drawCid = canvas.mpl_connect('draw_event', self._onDraw)
+
+    def addLine(self, ax, *args, **kwargs):
+        line, = ax.plot([], [], *args, animated=True, **kwargs)
+        state = self.axes.setdefault(ax, self._emptyState())
+        state['lines'].append(line)
+        return line
+
+    @staticmethod
+    def _emptyState():
+        return {'lines': [], 'xlim': None, 'ylim': None, 'ymin': np.inf, 'ymax': -np.inf, 'xlast': -np.inf}
+
+    def reset(self):
+        # forget the limits and extremes, e.g. after clearing the data
+        for ax, state in self.axes.items():
+            lines = state['lines']
+            self.axes[ax] = self._emptyState()
+            self.axes[ax]['lines'] = lines
+        self.needsLayout = True
+
+    def setData(self, line, x, y, newY=None):
+        # x, y is what to draw (already decimated), newY the samples added since the last frame;
+        # without newY the extremes are taken from y.
+        line.set_data(x, y)
+        if len(x) == 0:
+            return
+        state = self.axes[line.axes]
+        state['xlast'] = max(state['xlast'], x[-1])
+        fresh = y if newY is None else newY
+        if len(fresh):
+            with np.errstate(invalid='ignore'):
+                low, high = np.nanmin(fresh), np.nanmax(fresh)
+            if np.isfinite(low):
+                state['ymin'] = min(state['ymin'], low)
+                state['ymax'] = max(state['ymax'], high)
+
+        xlim, ylim = state['xlim'], state['ylim']
+        if xlim is None or state['xlast'] > xlim[1]:
+            self._pageX(state)
+        elif ylim is None or state['ymin'] < ylim[0] or state['ymax'] > ylim[1]:
+            self._fitY(state)
+
+    def _pageX(self, state):
+        # move x on by a page and re-fit y to what is on screen now, so y can shrink again
+        first = min(line.get_xdata()[0] for line in state['lines'] if len(line.get_xdata()))
+        last = state['xlast']
+        span = last - first if last > first else 1.0
+        state['xlim'] = (first, last + self.xMargin * span)
+        lows, highs = [], []
+        for line in state['lines']:
+            y = np.asarray(line.get_ydata(), dtype=np.float64)
+            if len(y) and np.isfinite(y).any():
+                lows.append(np.nanmin(y))
+                highs.append(np.nanmax(y))
+        if lows:
+            state['ymin'], state['ymax'] = min(lows), max(highs)
+        self._fitY(state)
+
+    def _fitY(self, state):
+        if not np.isfinite(state['ymin']):
+            return
+        span = state['ymax'] - state['ymin']
+        if span <= 0:
+            span = max(abs(state['ymax']) * 1e-3, 1e-6)
+        state['ylim'] = (state['ymin'] - self.yMargin * span, state['ymax'] + self.yMargin * span)
+        self.needsLayout = True
+
+    def render(self):
+        if self.needsLayout or self.background is None:
+            for ax, state in self.axes.items():
+                if state['xlim'] is not None:
+                    ax.set_xlim(*state['xlim'])
+                if state['ylim'] is not None:
+                    ax.set_ylim(*state['ylim'])
+            self.needsLayout = False
+            self.fullDraws += 1
+            self.canvas.draw() # _onDraw caches the new background and draws the lines
+            return
+        self.canvas.restore_region(self.background)
+        self._drawLines()
+        self.canvas.blit(self.figure.bbox)
+
+    def _drawLines(self):
+        for ax, state in self.axes.items():
+            for line in state['lines']:
+                ax.draw_artist(line)
+
+    def _onDraw(self, event):
+        # any full draw (ours, a resize, the toolbar) refreshes the cached background
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._drawLines()
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self._drawCid)
@@ -10,7 +10,7 @@ from matplotlib.pyplot import xlabel, ylabel, plot, figure, show, title, legend,
 from numpy import polyfit
 from numpy.ma.extras import apply_over_axes
 
-from averaging import simpleAvg
+from averaging import multiAvg
 from peakdetect import simplePeakDetect
 import math as math
 
@@ -130,9 +130,7 @@ for value in x4:
     l4.append(1473.15)
 # plot(x4, l4, marker=" ", markersize=5, ls="-", linewidth='4',label='Blackbody Temperature')
 
-averages10 = simpleAvg(temp4, 20)
-averages5 = simpleAvg(temp4, 5)
-averages50 = simpleAvg(temp4, 50)
+averages10, averages5, averages50 = multiAvg(temp4, [20, 5, 50])
 
 ax.plot(x4, averages10, marker="", markersize=3, ls="-", linewidth='1.5', label='Averaging: 10 data points', color="red")
 ax.plot(x4, averages5, marker="", markersize=3, ls="-", linewidth='1.5', label='Averaging: 5 data points', color="green")
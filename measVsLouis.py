@@ -1,11 +1,12 @@
-from calibration import findLinGraph, findLinParams
+from calibration import CalibrationSet
 from matplotlib.lines import lineMarkers
 from matplotlib.pyplot import xlabel, ylabel, plot, figure, show, title, legend, grid, axhline, axline, axvspan, \
     axvline, xlim
 
-myDataRcpT, myDataLnV = findLinGraph('Raw Data/Measurements26Feb/', 600, 1300, 100, 500, True)
-#LouisDataRcpT, LouisDataLnV = findLinGraph('Raw Data/Louis Data/', 900, 1300, 100, 500, True)
-m,c = findLinParams('Raw Data/Measurements26Feb/', 600, 1300, 100, 500, True)
+myData = CalibrationSet.fromFolder('Raw Data/Measurements26Feb/', 600, 1300, 100, 500)
+#LouisData = CalibrationSet.fromFolder('Raw Data/Louis Data/', 900, 1300, 100, 500)
+myDataRcpT, myDataLnV = myData.x, myData.y
+m,c = myData.fit()
 x = [0.0006,0.0012]
 y = []
 for val in x:
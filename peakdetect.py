@@ -1,33 +1,100 @@
 import math
 
-import matplotlib.pyplot as plt
 import numpy as np
 
+SPAN_LIMIT = 600.0 # max (x - x0)/timeConstant inside one block, exp(600) still fits in a float64
+MAX_BLOCK = 1 << 16 # samples per block, keeps the temporaries small
 
 
-def simplePeakDetect(xArr: list, yArr : list, timeConstant):
-    #time constant is the time it takes (in seconds) for signal to degrade to 36.8% of its original value.
-    #original peak = last peak found in the signal
-    #set inital values of last peak time, last peak voltage and current value. signal will degrade according to the last peak and time.
-    peakList = []
-    peakList.append(yArr[0])
-    currVal = yArr[0]
-    lastPeakVoltage = yArr[0]
-    lastPeakTime = xArr[0]
-    for i in range(len(xArr)-1):
-        i=i+1
-        degraded = currVal * math.exp((-(xArr[i] - xArr[i-1])) / (timeConstant)) # degraded signal according to time constant
-        if yArr[i] >= degraded:
-            currVal = yArr[i]
-            lastPeakVoltage = yArr[i]
-            lastPeakTime = xArr[i]
+class PeakDetector:
+    # Peak hold with exponential decay, fed in chunks:
+    #   peak[i] = max(y[i], peak[i-1] * exp(-(x[i] - x[i-1]) / timeConstant))
+    # Unrolled this is peak[i] = exp(-x[i]/tc) * max over j <= i of y[j] * exp(x[j]/tc), so each block is
+    # a running maximum (np.fmax.accumulate) of weighted samples instead of a Python loop.
+    # nan samples (V <= 0, lost samples) are skipped: the peak carries on decaying through them.
+    # The last peak and its time carry between chunks, so chunked and batch calls give the same result.
+
+    def __init__(self, timeConstant, dtype=np.float64):
+        #time constant is the time it takes (in seconds) for signal to degrade to 36.8% of its original value.
+        if timeConstant <= 0:
+            raise ValueError("Time constant must be positive")
+        self.timeConstant = float(timeConstant)
+        self.dtype = dtype
+        self._weightStep = None # sample interval the cached weights were built for
+        self._weights = None # exp(k*dt/timeConstant) for uniform sampling, computed once
+        self.reset()
+
+    def reset(self):
+        self.lastTime = None
+        self.lastValue = None
+
+    def _uniformWeights(self, dt):
+        if self._weightStep != dt:
+            blockLen = MAX_BLOCK if dt == 0 else int(min(MAX_BLOCK, max(1, SPAN_LIMIT * self.timeConstant / dt)))
+            self._weights = np.exp(np.arange(blockLen) * (dt / self.timeConstant))
+            self._weightStep = dt
+        return self._weights
+
+    def update(self, xChunk, yChunk):
+        x = np.asarray(xChunk, dtype=np.float64)
+        y = np.asarray(yChunk, dtype=np.float64)
+        n = len(y)
+        out = np.empty(n, dtype=self.dtype)
+        if n == 0:
+            return out
+
+        if self.lastTime is None:
+            # first sample ever, the peak starts at the signal
+            carry, carryTime = y[0], x[0]
         else:
-            currVal = degraded
-        peakList.append(currVal)
+            carry, carryTime = self.lastValue, self.lastTime
+
+        steps = np.diff(x)
+        if n > 1 and steps.min() < 0:
+            # time goes backwards somewhere, the block formula needs sorted times
+            return self._updateLoop(x, y, out, carry, carryTime)
+
+        uniform = n > 1 and np.allclose(steps, steps[0], rtol=1e-9, atol=0)
+        weights = self._uniformWeights(steps[0]) if uniform else None
+        tc = self.timeConstant
 
-    return peakList
+        start = 0
+        while start < n:
+            x0 = x[start]
+            if uniform:
+                stop = min(n, start + len(weights))
+                w = weights[:stop - start]
+            else:
+                stop = int(np.searchsorted(x, x0 + SPAN_LIMIT * tc, side='right'))
+                stop = min(n, start + MAX_BLOCK, max(stop, start + 1))
+                w = np.exp((x[start:stop] - x0) / tc)
+            z = y[start:stop] * w
+            z[0] = np.fmax(z[0], carry * math.exp(-(x0 - carryTime) / tc))
+            np.fmax.accumulate(z, out=z) # fmax: a nan sample leaves the peak as it was instead of spreading
+            np.divide(z, w, out=z)
+            out[start:stop] = z
+            carry, carryTime = z[-1], x[stop - 1]
+            start = stop
 
+        self.lastValue, self.lastTime = carry, carryTime
+        return out
 
+    def _updateLoop(self, x, y, out, carry, carryTime):
+        currVal, lastTime = carry, carryTime
+        for i in range(len(y)):
+            degraded = currVal * math.exp((-(x[i] - lastTime)) / (self.timeConstant)) # degraded signal according to time constant
+            currVal = np.fmax(y[i], degraded) # nan samples are skipped, same as the block path
+            lastTime = x[i]
+            out[i] = currVal
+        self.lastValue, self.lastTime = currVal, lastTime
+        return out
 
 
+def peakDetect(xArr, yArr, timeConstant, dtype=np.float64):
+    # peak detection over a whole capture, returns an ndarray
+    return PeakDetector(timeConstant, dtype).update(xArr, yArr)
 
+
+def simplePeakDetect(xArr: list, yArr : list, timeConstant):
+    # list version kept for the plotting scripts
+    return peakDetect(xArr, yArr, timeConstant).tolist()
@@ -0,0 +1,158 @@
+import numpy as np
+
+from averaging import multiAvg
+from calibration import voltToTempArr, emisCompArr
+from peakdetect import peakDetect
+from profiling import profiler
+
+# Voltage -> temperature processing of one capture, as done by GUI2 for every loaded file:
+#   temperature  emissivity compensation and lnV = m/T + c over the whole capture, in Kelvin
+#   slice        start/end sample range
+#   peak         peak detection with the given time constant (None = off)
+#   average      moving average over the given number of samples (None = off)
+# Each file keeps a StageCache so that changing one parameter only redoes the stages after it.
+# Results are always Kelvin, the display unit is applied when plotting (see decimate.DecimatedPlot),
+# so switching units doesn't touch the data. params['dtype'] = np.float32 halves every stage's output;
+# peak detection and averaging still accumulate in float64 and only store float32.
+STAGES = ('temperature', 'slice', 'peak', 'average')
+
+
+class StageCache:
+    # Memo of one file's pipeline. Every stage stores its result with the key it was computed from. A key
+    # is the stage's own parameters plus the key of the stage before it, so a change invalidates that
+    # stage and everything downstream while the stages before it are reused as they are.
+    # Emissivity compensation isn't cached on its own, its output is only ever used by the conversion.
+
+    def __init__(self):
+        self.entries = {} # stage -> (key, result)
+        self.hits = 0
+        self.misses = 0
+        self.lastComputed = [] # stages recomputed by the last process() call
+
+    def run(self, stage, key, compute, *args):
+        entry = self.entries.get(stage)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1]
+        result = compute(*args)
+        self.entries[stage] = (key, result)
+        self.misses += 1
+        self.lastComputed.append(stage)
+        return result
+
+    def resume(self, keys):
+        # Index in keys of the first stage to compute. A key covers every stage before it, so the run
+        # can pick up after the latest stage that is still cached, even if earlier ones aren't held.
+        for i in range(len(keys) - 1, -1, -1):
+            stage, key = keys[i]
+            entry = self.entries.get(stage)
+            if entry is not None and entry[0] == key:
+                return i + 1
+        return 0
+
+    def stale(self, keys):
+        # stages of stageKeys() that would have to be recomputed
+        return [stage for stage, key in keys[self.resume(keys):]]
+
+    def seed(self, keys):
+        # a cache holding only what a run needs to pick up where this one stops, to send to a worker
+        seed = StageCache()
+        first = self.resume(keys)
+        if first > 0:
+            stage = keys[first - 1][0]
+            seed.entries[stage] = self.entries[stage]
+        return seed
+
+    def update(self, entries):
+        self.entries.update(entries)
+
+    def prune(self, keys):
+        # Drops entries the current stageKeys() can't use: stages switched off, or computed with other
+        # parameters. Each holds a full-length array, and GUI2 keeps a cache per file.
+        current = dict(keys)
+        self.entries = {stage: entry for stage, entry in self.entries.items() if current.get(stage) == entry[0]}
+
+    def computed(self):
+        return list(self.lastComputed)
+
+    def clear(self):
+        self.entries = {}
+        self.lastComputed = []
+
+
+def sampleRange(length, start, end):
+    # same clamping GUI2 has always done: end past the data is cut back, an empty range means from 0
+    end = min(end, length)
+    if start >= end:
+        start = 0
+    return start, end
+
+
+def stageKeys(length, params):
+    # (stage, key) of every stage the params switch on, in order
+    start, end = sampleRange(length, params['start'], params['end'])
+    key = (params['emissivity'], params['gradient'], params['intercept'],
+           np.dtype(params.get('dtype', np.float64)).name)
+    keys = [('temperature', key)]
+    key = (key, start, end)
+    keys.append(('slice', key))
+    key = (key, params['timeConstant'])
+    if params['timeConstant'] is not None:
+        keys.append(('peak', key))
+    key = (key, params['samples'])
+    if params['samples'] is not None:
+        keys.append(('average', key))
+    return keys
+
+
+def process(time, voltage, params, cache=None):
+    # params: emissivity, gradient, intercept, start, end,
+    #         timeConstant (None = no peak detection), samples (None = no averaging),
+    #         and dtype (of every stage's result, np.float64 by default)
+    # Returns (time, temperature in K) for the sample range. Results can be cached arrays, don't write to them.
+    # voltage is only read if the temperature stage isn't cached, it can be None when it is.
+    cache = cache if cache is not None else StageCache()
+    start, end = sampleRange(len(time), params['start'], params['end'])
+    timeSlice = time[start:end]
+    dtype = np.dtype(params.get('dtype', np.float64))
+
+    def toKelvin(temp):
+        with profiler.stage('emisComp', len(voltage)):
+            comp = emisCompArr(voltage, params['emissivity'], dtype=dtype)
+        with profiler.stage('voltToTemp', len(voltage)):
+            return voltToTempArr(comp, params['gradient'], params['intercept'], celsius=False, dtype=dtype)
+
+    samples = end - start
+    compute = {
+        'temperature': toKelvin,
+        'slice': lambda temp: temp[start:end], # view, no copy
+        'peak': profiler.wrap('peakDetect',
+                              lambda temp: peakDetect(timeSlice, temp, float(params['timeConstant']), dtype), samples),
+        'average': profiler.wrap('average', lambda temp: multiAvg(temp, [int(params['samples'])], dtype)[0], samples),
+    }
+
+    cache.lastComputed = []
+    keys = stageKeys(len(time), params)
+    first = cache.resume(keys)
+    temp = cache.entries[keys[first - 1][0]][1] if first > 0 else None
+    for stage, key in keys[first:]:
+        temp = cache.run(stage, key, compute[stage], temp)
+    cache.prune(keys)
+    return timeSlice, temp
+
+
+def processFile(time, voltage, params, seed, profile=False):
+    # Entry point for a worker process, seed being StageCache.seed() of the file's cache (voltage can be
+    # None unless the temperature stage is stale). Only the newly computed stages are sent back, for
+    # StageCache.update(). Slices are left out: they are views on the caller's side and free to remake,
+    # pickled they'd be full copies. With profile the worker's stage timings come back too (else None).
+    records = None
+    if profile:
+        profiler.reset() # the worker's profiler only ever holds the job in hand
+        with profiler.trace():
+            process(time, voltage, params, seed)
+        records = profiler.records()
+    else:
+        process(time, voltage, params, seed)
+    entries = {stage: seed.entries[stage] for stage in seed.lastComputed if stage != 'slice'}
+    return entries, records
@@ -0,0 +1,127 @@
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+
+# Opt-in per-stage timing of the processing and plotting code. Stages are wrapped in
+#     with profiler.stage('voltToTemp', len(v)):
+# and add up wall time, calls and samples under their name. The module-level profiler is off by default,
+# a disabled stage() costs an attribute check. While trace(memory=True) is on, each stage also records its
+# peak allocation (tracemalloc peak since the stage started; nested stages reset their parent's peak).
+# Worker processes have their own profiler: turn it on there and send records() back for merge().
+
+PROFILE_TOP = 40 # functions kept from a cProfile run
+
+
+class Profiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock() # the live monitor records from the Tk thread and the GUI from Qt
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._records = {} # name -> {'calls', 'seconds', 'samples', 'peak_bytes'}
+        self.cprofile = None # pstats text of the last traced run
+        self.allocations = None # top tracemalloc allocation sites of the last traced run
+
+    @contextlib.contextmanager
+    def stage(self, name, samples=0):
+        if not self.enabled:
+            yield
+            return
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - before if tracing else 0
+            self.add(name, seconds, samples, peak)
+
+    def wrap(self, name, func, samples=0):
+        # func timed as a stage, or func itself when disabled
+        if not self.enabled:
+            return func
+
+        def timed(*args, **kwargs):
+            with self.stage(name, samples):
+                return func(*args, **kwargs)
+        return timed
+
+    def add(self, name, seconds, samples=0, peakBytes=0, calls=1):
+        with self._lock:
+            record = self._records.setdefault(name, {'calls': 0, 'seconds': 0.0, 'samples': 0, 'peak_bytes': 0})
+            record['calls'] += calls
+            record['seconds'] += seconds
+            record['samples'] += samples
+            record['peak_bytes'] = max(record['peak_bytes'], peakBytes)
+
+    def records(self):
+        with self._lock:
+            return {name: dict(record) for name, record in self._records.items()}
+
+    def merge(self, records):
+        # add records() from another profiler, e.g. sent back by a worker process
+        for name, record in records.items():
+            self.add(name, record['seconds'], record['samples'], record['peak_bytes'], record['calls'])
+
+    def summary(self, limit=6):
+        # one line for a status bar, slowest stages first
+        records = sorted(self.records().items(), key=lambda item: -item[1]['seconds'])
+        parts = []
+        for name, record in records[:limit]:
+            text = f"{name} {record['seconds'] * 1e3:.0f} ms"
+            if record['samples'] and record['seconds'] > 0:
+                text += f" ({record['samples'] / record['seconds'] / 1e6:.1f} MS/s)"
+            if record['peak_bytes']:
+                text += f" {record['peak_bytes'] / 2**20:.0f} MB"
+            parts.append(text)
+        return " | ".join(parts) if parts else "No stages recorded"
+
+    def asDict(self):
+        stages = {}
+        for name, record in self.records().items():
+            stages[name] = dict(record, throughput=record['samples'] / record['seconds'] if record['seconds'] else None)
+        return {'stages': stages, 'cprofile': self.cprofile, 'allocations': self.allocations}
+
+    def dump(self, filePath):
+        with open(filePath, 'w') as f:
+            json.dump(self.asDict(), f, indent=1)
+
+    @contextlib.contextmanager
+    def trace(self, cprofile=False, memory=False):
+        # Around a single run: enables the stages, and optionally cProfile (this thread only) and tracemalloc.
+        # The results are kept in .cprofile / .allocations and go into dump().
+        wasEnabled = self.enabled
+        self.enabled = True
+        profile = cProfile.Profile() if cprofile else None
+        startedTracing = memory and not tracemalloc.is_tracing()
+        if startedTracing:
+            tracemalloc.start()
+        if profile:
+            profile.enable()
+        try:
+            yield self
+        finally:
+            if profile:
+                profile.disable()
+                text = io.StringIO()
+                pstats.Stats(profile, stream=text).sort_stats('cumulative').print_stats(PROFILE_TOP)
+                self.cprofile = text.getvalue()
+            if memory and tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                self.allocations = [str(stat) for stat in snapshot.statistics('lineno')[:PROFILE_TOP]]
+            if startedTracing:
+                tracemalloc.stop()
+            self.enabled = wasEnabled
+
+
+profiler = Profiler()
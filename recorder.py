@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from captureio import HEADER_BYTES, CaptureWriter
+
+# Recording of a live session to binary captures on its own thread.
+
+
+class CaptureRecorder(threading.Thread):
+    # Streams every sample the acquisition thread puts in the ring to disk. It keeps its own read position
+    # in the ring, so recording never waits on the GUI and the GUI never waits on the disk. Samples are
+    # written once blockSeconds of them have arrived, and at most that many at a time, so memory stays at
+    # one block on top of the ring. The backlog (acquired, not yet written) can reach the ring's length
+    # before anything is lost; lost samples are written as nan so each file's time stays index / rate.
+    # Every block is synced to disk before the next, and throughput in stats() times the writes up to the
+    # sync, so it is the disk's rate, not the page cache's.
+    # With maxBytes (whole file, header included) or maxSeconds the recording rotates to a new file when the
+    # current one is full:
+    # run.irc becomes run_0001.irc, run_0002.irc, ..., each header starting at the time of its first sample.
+    # Those times count from the acquisition thread's start time, taken when the device started; without
+    # one they are worked back from the samples in the ring when the first of them is seen.
+
+    def __init__(self, ring, filePath, sampleRate, names, calibration=None, units='C', dtype=np.float32,
+                 blockSeconds=1.0, maxBytes=None, maxSeconds=None, startPosition=0, poll=0.05, acquisition=None):
+        super().__init__(daemon=True)
+        self.ring = ring
+        self.filePath = filePath
+        self.sampleRate = sampleRate
+        self.names = [names] if isinstance(names, str) else list(names)
+        self.calibration = calibration
+        self.units = units
+        self.dtype = np.dtype(dtype)
+        self.blockSamples = max(1, int(sampleRate * blockSeconds))
+        self.poll = poll
+        self.startPosition = startPosition
+        self.position = startPosition # index in the ring of the next sample to write
+        self.acquisition = acquisition # AcquisitionThread filling the ring
+        self.startTime = None # Unix time of ring sample 0, known once samples arrive
+
+        frameBytes = len(self.names) * self.dtype.itemsize
+        limits = []
+        if maxBytes:
+            limits.append(max(1, (int(maxBytes) - HEADER_BYTES) // frameBytes))
+        if maxSeconds:
+            limits.append(max(1, int(maxSeconds * sampleRate)))
+        self.samplesPerFile = min(limits) if limits else None
+
+        self.writer = None
+        self.files = [] # every file written so far, oldest first
+        self.written = 0 # samples written, lost ones included
+        self.lost = 0
+        self.bytesWritten = 0
+        self.writeSeconds = 0.0 # time spent writing and syncing
+        self.maxBacklog = 0
+        self.error = None # exception that stopped the thread, checked by the GUI
+        self._stopEvent = threading.Event()
+
+    def run(self):
+        try:
+            while True:
+                stopping = self._stopEvent.is_set()
+                available = self.ring.count - self.position
+                self.maxBacklog = max(self.maxBacklog, available)
+                if self.startTime is None and available:
+                    self._startClock()
+                if available == 0 and stopping:
+                    break
+                if available < self.blockSamples and not stopping:
+                    self._stopEvent.wait(self.poll)
+                    continue
+                start, data = self.ring.read(self.position, self.position + self.blockSamples)
+                if start > self.position:
+                    self._writeGap(start - self.position) # fell more than the ring behind
+                self._write(data)
+                self.position = start + data.shape[-1]
+        except Exception as e:
+            self.error = e
+        finally:
+            if self.writer:
+                self.writer.close()
+
+    def stop(self):
+        # writes what is still in the ring, then closes the file; join() to wait for it
+        self._stopEvent.set()
+
+    def _startClock(self):
+        started = getattr(self.acquisition, 'startTime', None)
+        self.startTime = started if started is not None else time.time() - self.ring.count / self.sampleRate
+
+    def _writeGap(self, count):
+        self.lost += count
+        while count > 0:
+            n = min(count, self.blockSamples)
+            self._write(np.full((len(self.names), n), np.nan, dtype=self.dtype))
+            count -= n
+
+    def _write(self, data):
+        data = data.reshape(len(self.names), -1)
+        began = time.perf_counter()
+        while data.shape[-1]:
+            if self.writer is None or (self.samplesPerFile and self.writer.samples >= self.samplesPerFile):
+                self._rotate()
+            n = data.shape[-1] if not self.samplesPerFile else min(data.shape[-1],
+                                                                   self.samplesPerFile - self.writer.samples)
+            self.writer.append(data[:, :n])
+            self.bytesWritten += n * len(self.names) * self.dtype.itemsize
+            self.written += n
+            data = data[:, n:]
+        self.writer.sync()
+        self.writeSeconds += time.perf_counter() - began
+
+    def _rotate(self):
+        if self.writer:
+            self.writer.sync()
+            self.writer.close()
+        filePath = self.filePath
+        if self.samplesPerFile:
+            stem, ext = os.path.splitext(self.filePath)
+            filePath = f"{stem}_{len(self.files) + 1:04d}{ext}"
+        self.writer = CaptureWriter(filePath, self.sampleRate, self.names, self.calibration, self.units,
+                                    startTime=self.startTime + (self.startPosition + self.written) / self.sampleRate,
+                                    dtype=self.dtype)
+        self.files.append(filePath)
+
+    def stats(self):
+        return {
+            'samples': self.written,
+            'lost': self.lost,
+            'backlog': self.ring.count - self.position,
+            'max_backlog': self.maxBacklog,
+            'bytes': self.bytesWritten,
+            'throughput': self.bytesWritten / self.writeSeconds if self.writeSeconds else None, # bytes/s
+            'files': list(self.files),
+        }
@@ -0,0 +1,91 @@
+import numpy as np
+
+
+class RingBuffer:
+    # Preallocated typed ring of the newest samples with a monotonic count of every sample ever written.
+    # Every sample is stored twice, at i and i+capacity, so any run of up to capacity consecutive samples
+    # is one contiguous slice: latest() and view() hand out zero-copy views for plotting and export.
+    # One writer announces how far its write goes (writing), fills the slots, and only then advances count.
+    # read() copies by sample index and drops anything a write announced by the end of the copy may have
+    # overwritten, so a writer on another thread (the acquisition thread) and a reader never take a lock. Views are only stable while nothing
+    # writes, use them from the thread that writes.
+    # With channels the ring holds (channels, samples) blocks: every write, view and read is along the
+    # sample axis, so all channels move together.
+
+    def __init__(self, capacity, dtype=np.float64, channels=None):
+        self.capacity = int(capacity)
+        if self.capacity < 1:
+            raise ValueError("Ring buffer capacity must be at least 1")
+        self.channels = channels
+        shape = (2 * self.capacity,) if channels is None else (int(channels), 2 * self.capacity)
+        self.buffer = np.zeros(shape, dtype=dtype)
+        self.count = 0 # samples written since the start (or the last clear), never wraps
+        self.writing = 0 # count once the write in progress is done, equal to count between writes
+
+    def __len__(self):
+        # samples currently held
+        return min(self.count, self.capacity)
+
+    @property
+    def dtype(self):
+        return self.buffer.dtype
+
+    def write(self, chunk):
+        chunk = np.asarray(chunk, dtype=self.buffer.dtype)
+        n = chunk.shape[-1]
+        if n == 0:
+            return
+        skipped = 0
+        if n > self.capacity:
+            # only the newest capacity samples can be kept, count moves past the rest with them below
+            skipped = n - self.capacity
+            chunk = chunk[..., -self.capacity:]
+            n = self.capacity
+        self.writing = self.count + skipped + n # before any slot changes, see read()
+        start = (self.count + skipped) % self.capacity
+        first = min(n, self.capacity - start)
+        cap = self.capacity
+        self.buffer[..., start:start + first] = chunk[..., :first]
+        self.buffer[..., start + cap:start + cap + first] = chunk[..., :first]
+        self.buffer[..., :n - first] = chunk[..., first:]
+        self.buffer[..., cap:cap + n - first] = chunk[..., first:]
+        self.count += skipped + n # publish only once the data is in place
+
+    def view(self, start, stop=None):
+        # zero-copy view of the samples with index start..stop-1 still held (stop defaults to count)
+        count = self.count
+        stop = count if stop is None else min(stop, count)
+        start = max(start, stop - self.capacity, 0)
+        if start >= stop:
+            return self.buffer[..., :0]
+        first = start % self.capacity
+        return self.buffer[..., first:first + (stop - start)]
+
+    def latest(self, n=None):
+        # zero-copy view of the newest n samples (all of them by default), oldest first
+        n = len(self) if n is None else min(n, len(self))
+        return self.view(self.count - n)
+
+    def read(self, start, stop=None):
+        # Copies the samples with index start..stop-1 (stop defaults to everything written so far).
+        # Returns (index of the first sample returned, data); the index is later than start if those
+        # samples were already overwritten, which means the reader fell more than capacity behind.
+        count = self.count
+        stop = count if stop is None else min(stop, count)
+        start = max(start, stop - self.capacity, 0)
+        data = self.view(start, stop).copy()
+
+        # anything a write started before the copy ended could have overwritten is unreliable
+        safe = self.writing - self.capacity
+        if safe > start:
+            data = data[..., min(safe - start, data.shape[-1]):]
+            start = min(max(safe, start), stop)
+        return start, data
+
+    def snapshot(self, n):
+        # copy of the newest n samples
+        return self.read(self.count - n)[1]
+
+    def clear(self):
+        self.count = 0
+        self.writing = 0
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+import averaging
+from averaging import BLOCK_SIZE, MovingAverage, multiAvg, simpleAvg
+
+
+def loopAvg(y, hold):
+    # the queue-based loop simpleAvg used to be
+    total = 0.0
+    window = []
+    out = []
+    for i, value in enumerate(y):
+        if len(window) < hold:
+            window.append(value)
+            total += value
+            out.append(total / (i + 1))
+        else:
+            total = out[-1] * hold + value - window.pop(0)
+            window.append(value)
+            out.append(total / hold)
+    return np.array(out)
+
+
+def signal(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 900 + 50 * np.sin(np.arange(n) / 50) + rng.standard_normal(n)
+
+
+@pytest.mark.parametrize('hold', [1, 5, 20, 999])
+def test_multi_avg_matches_the_loop(hold):
+    y = signal(1000) # hold 999 is nearly all warm-up
+    np.testing.assert_allclose(multiAvg(y, [hold])[0], loopAvg(y, hold), rtol=1e-12)
+    np.testing.assert_allclose(simpleAvg(list(y), hold), loopAvg(y, hold), rtol=1e-12)
+
+
+def test_window_longer_than_the_data_averages_everything_seen():
+    y = signal(50)
+    np.testing.assert_allclose(multiAvg(y, [200])[0], np.cumsum(y) / np.arange(1, 51), rtol=1e-12)
+
+
+def test_several_windows_at_once():
+    y = signal(500)
+    out = multiAvg(y, [5, 20])
+    np.testing.assert_allclose(out[0], loopAvg(y, 5), rtol=1e-12)
+    np.testing.assert_allclose(out[1], loopAvg(y, 20), rtol=1e-12)
+
+
+def test_uneven_chunks_match_one_shot():
+    y = signal(5000)
+    averager = MovingAverage([3, 40, 700])
+    bounds = [0, 1, 2, 39, 40, 41, 500, 501, 1300, 4999, 5000]
+    chunked = np.hstack([averager.update(y[a:b]) for a, b in zip(bounds[:-1], bounds[1:])])
+    np.testing.assert_allclose(chunked, multiAvg(y, [3, 40, 700]), rtol=1e-12)
+
+
+def test_block_boundary():
+    # multiAvg feeds long captures in BLOCK_SIZE blocks, the result must not show the seams
+    y = signal(BLOCK_SIZE + 3000)
+    oneShot = MovingAverage([20, 2500]).update(y)
+    np.testing.assert_allclose(multiAvg(y, [20, 2500]), oneShot, rtol=1e-12)
+
+
+def test_small_blocks_match_the_loop(monkeypatch):
+    monkeypatch.setattr(averaging, 'BLOCK_SIZE', 64)
+    y = signal(1000)
+    np.testing.assert_allclose(multiAvg(y, [100])[0], loopAvg(y, 100), rtol=1e-12)
+
+
+def test_windows_must_be_positive():
+    with pytest.raises(ValueError):
+        MovingAverage([0])
@@ -0,0 +1,25 @@
+import pytest
+
+from batch import SUMMARY_NAME, findCaptures, main
+
+
+@pytest.mark.parametrize('argv', [["capture.csv", "--workers", "0"], ["capture.csv", "--workers", "-2"],
+                                  ["capture.csv", "--emissivity", "0"], ["capture.csv", "--emissivity", "1.5"]])
+def test_bad_arguments_are_refused_before_any_work(argv, capsys):
+    with pytest.raises(SystemExit) as exit:
+        main(argv)
+    assert exit.value.code == 2
+    assert "error" in capsys.readouterr().err
+
+
+def test_outputs_are_not_taken_as_captures(tmp_path):
+    (tmp_path / "1000.csv").write_text("Time,Dev1/ai0\n")
+    out = tmp_path / "processed"
+    out.mkdir()
+    (out / "1000_processed.csv").write_text("")
+    (out / SUMMARY_NAME).write_text("")
+    assert findCaptures([str(tmp_path), str(tmp_path / "**" / "*.csv")], str(out)) == [str(tmp_path / "1000.csv")]
+    # results written next to the captures
+    (tmp_path / "1000_processed.csv").write_text("")
+    (tmp_path / SUMMARY_NAME).write_text("")
+    assert findCaptures([str(tmp_path)], str(tmp_path)) == [str(tmp_path / "1000.csv")]
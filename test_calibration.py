@@ -0,0 +1,144 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from calibration import CalibrationSet, bootstrapLinParams, bootstrapMeans, calibrationPoints, findLinParams
+from calibrationCache import CACHE_NAME
+
+MEASUREMENTS = os.path.join(os.path.dirname(__file__), "Raw Data", "Measurements26Feb")
+
+
+def writeFolder(folder, signal, dark, temps=(600, 700, 800), samples=50):
+    rng = np.random.default_rng(0)
+    for temperature in temps:
+        for name, level in ((f"{temperature}.csv", signal), (f"{temperature}B.csv", dark)):
+            pd.DataFrame({'Time': ['00:00.0'] * samples, 'Dev1/ai0': level + 1e-6 * rng.standard_normal(samples),
+                          'Average': ''}).to_csv(folder / name, index=False)
+
+
+def copyMeasurements(folder, temps=(600, 700, 800)):
+    for temperature in temps:
+        for name in (f"{temperature}.csv", f"{temperature}B.csv"):
+            shutil.copy(os.path.join(MEASUREMENTS, name), folder / name)
+    return str(folder)
+
+
+def fullReadVoltage(folder, temperature, samples):
+    # what calibrationPoints did before it read only the voltage column and the rows it averages
+    signal = pd.read_csv(f"{folder}/{temperature}.csv").loc[:samples, "Dev1/ai0"]
+    blocked = pd.read_csv(f"{folder}/{temperature}B.csv").loc[:samples, "Dev1/ai0"]
+    return np.average(signal) - np.average(blocked)
+
+
+def test_calibration_points_match_a_full_read(tmp_path):
+    folder = copyMeasurements(tmp_path)
+    temps, voltages = calibrationPoints(folder, 600, 800, 100, 500, useCache=False)
+    assert voltages == [fullReadVoltage(folder, temperature, 500) for temperature in temps]
+
+
+def test_cached_points_match_uncached(tmp_path):
+    folder = copyMeasurements(tmp_path)
+    first = calibrationPoints(folder, 600, 800, 100, 500)
+    assert os.path.exists(os.path.join(folder, CACHE_NAME))
+    assert calibrationPoints(folder, 600, 800, 100, 500) == first
+    assert calibrationPoints(folder, 600, 800, 100, 500, useCache=False) == first
+
+
+def test_changed_file_is_read_again(tmp_path):
+    folder = copyMeasurements(tmp_path)
+    before = calibrationPoints(folder, 600, 800, 100, 500)[1]
+    # replace 700.csv with different readings, and touch 800B.csv without changing it
+    frame = pd.read_csv(os.path.join(folder, "700.csv"))
+    frame["Dev1/ai0"] *= 2
+    frame.to_csv(os.path.join(folder, "700.csv"), index=False)
+    stat = os.stat(os.path.join(folder, "800B.csv"))
+    os.utime(os.path.join(folder, "800B.csv"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    after = calibrationPoints(folder, 600, 800, 100, 500)[1]
+    assert after[0] == before[0]
+    assert after[1] == pytest.approx(fullReadVoltage(folder, 700, 500))
+    assert after[1] != pytest.approx(before[1])
+    assert after[2] == before[2]
+
+
+@pytest.mark.parametrize('contents', ["{not json", "[1, 2]", '{"version": 1, "entries": [3]}',
+                                      '{"version": 1, "entries": {"600:500": {"voltage": 5}}}',
+                                      '{"version": 1, "entries": {"600:500": 7}}',
+                                      '{"version": 99, "entries": {}}'])
+def test_corrupt_or_foreign_cache_is_ignored(tmp_path, contents):
+    folder = copyMeasurements(tmp_path)
+    with open(os.path.join(folder, CACHE_NAME), 'w') as f:
+        f.write(contents)
+    expected = calibrationPoints(folder, 600, 800, 100, 500, useCache=False)
+    assert calibrationPoints(folder, 600, 800, 100, 500) == expected
+    with open(os.path.join(folder, CACHE_NAME)) as f:
+        assert json.load(f)["version"] == 1 # rewritten with good entries
+
+
+@pytest.fixture(scope="module")
+def measurements():
+    return CalibrationSet.fromFolder(MEASUREMENTS, 600, 1300, 100, 500, useCache=False)
+
+
+def polyfitPoints(calibration, mask):
+    return np.polyfit(calibration.x[mask], calibration.y[mask], 1)
+
+
+def test_calibration_set_fit_matches_find_lin_params(measurements):
+    m, c = findLinParams(MEASUREMENTS, 600, 1300, 100, 500, celsius=True, useCache=False)
+    np.testing.assert_allclose(measurements.fit(), (m, c), rtol=1e-12)
+
+
+@pytest.mark.parametrize('lowest, highest, exclude', [(700, 1200, ()), (None, 1000, ()), (600, 1300, (900, 1100))])
+def test_subset_fits_match_polyfit(measurements, lowest, highest, exclude):
+    mask = measurements.select(lowest, highest, exclude)
+    np.testing.assert_allclose(measurements.fit(lowest, highest, exclude), polyfitPoints(measurements, mask),
+                               rtol=1e-12)
+
+
+def test_leave_one_out_matches_refitting(measurements):
+    temps, m, c, errors = measurements.leaveOneOut(700, 1300)
+    indices = np.flatnonzero(measurements.select(700, 1300))
+    for k, i in enumerate(indices):
+        mask = measurements.select(700, 1300, exclude=(measurements.temps[i],))
+        mRef, cRef = polyfitPoints(measurements, mask)
+        np.testing.assert_allclose((m[k], c[k]), (mRef, cRef), rtol=1e-12)
+        expected = mRef / (measurements.y[i] - cRef) - measurements.kelvin[i]
+        assert errors[k] == pytest.approx(expected, abs=1e-9)
+    np.testing.assert_array_equal(temps, measurements.temps[indices])
+
+
+def test_r_squared_and_error_table(measurements):
+    mask = measurements.select(600, 1300)
+    report = measurements.report()
+    m, c = polyfitPoints(measurements, mask)
+    fitted = m * measurements.x + c
+    ssRes = ((measurements.y - fitted) ** 2).sum()
+    ssTot = ((measurements.y - measurements.y.mean()) ** 2).sum()
+    assert report['r_squared'] == pytest.approx(1 - ssRes / ssTot, abs=1e-12)
+    np.testing.assert_allclose(report['errors'], m / (measurements.y - c) - measurements.kelvin, atol=1e-9)
+    np.testing.assert_allclose(report['loo_errors'], measurements.leaveOneOut()[3])
+    np.testing.assert_array_equal(report['temps'], np.arange(600, 1301, 100))
+    assert report['wavelength'] == pytest.approx(-0.014388 / m, rel=1e-12)
+
+
+def test_too_few_points_raise(measurements):
+    with pytest.raises(ValueError):
+        measurements.fit(600, 650)
+    with pytest.raises(ValueError):
+        measurements.leaveOneOut(600, 700)
+
+
+def test_bootstrap_without_valid_replicates_raises(tmp_path):
+    # blocked reading above the signal at every set point, so no replicate has a voltage to take the log of
+    writeFolder(tmp_path, signal=1e-4, dark=1e-3)
+    with pytest.raises(ValueError, match="No usable bootstrap replicates"):
+        bootstrapLinParams(str(tmp_path), 600, 800, 100, 50, celsius=True, replicates=20, seed=0)
+
+
+def test_bootstrap_means_of_nothing_raises():
+    with pytest.raises(ValueError):
+        bootstrapMeans(np.array([]), 10, np.random.default_rng(0))
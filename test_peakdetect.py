@@ -0,0 +1,42 @@
+import numpy as np
+
+from peakdetect import PeakDetector, peakDetect
+
+
+def loopPeaks(x, y, timeConstant):
+    # reference: the per-sample loop the block path replaces
+    detector = PeakDetector(timeConstant)
+    return detector._updateLoop(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64),
+                                np.empty(len(y)), y[0], x[0])
+
+
+def test_nan_samples_are_skipped_like_the_loop():
+    rng = np.random.default_rng(0)
+    x = np.arange(2000) / 1000.0
+    y = rng.uniform(900, 1000, len(x))
+    y[100] = np.nan
+    y[500:510] = np.nan
+    out = peakDetect(x, y, 0.05)
+    assert np.count_nonzero(np.isnan(out)) == 0
+    np.testing.assert_allclose(out, loopPeaks(x, y, 0.05), rtol=1e-12)
+
+
+def test_leading_nan_takes_the_first_valid_sample():
+    x = np.arange(1000) / 1000.0
+    y = np.linspace(500, 600, len(x))
+    y[:3] = np.nan
+    out = peakDetect(x, y, 0.05)
+    assert np.isnan(out[:3]).all()
+    np.testing.assert_allclose(out[3:], loopPeaks(x, y, 0.05)[3:], rtol=1e-12)
+    np.testing.assert_allclose(out[3:], y[3:], rtol=1e-12) # rising signal, the peak is the signal
+
+
+def test_chunked_nan_carry():
+    rng = np.random.default_rng(1)
+    x = np.arange(3000) / 1000.0
+    y = rng.uniform(0, 1, len(x))
+    y[999] = np.nan # last sample of the first chunk
+    detector = PeakDetector(0.01)
+    chunked = np.concatenate([detector.update(x[i:i + 1000], y[i:i + 1000]) for i in range(0, len(x), 1000)])
+    np.testing.assert_allclose(chunked, peakDetect(x, y, 0.01), rtol=1e-12)
+    assert not np.isnan(detector.lastValue)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from daqbackend import SIM_GRADIENT, SIM_INTERCEPT
+from pipeline import StageCache, process, stageKeys
+
+PRECISION_TOLERANCE = 0.01 # °C, float32 against float64
+
+
+def rampParams(length, **extra):
+    params = {'emissivity': 0.9, 'gradient': SIM_GRADIENT, 'intercept': SIM_INTERCEPT,
+              'start': 0, 'end': length, 'timeConstant': None, 'samples': None}
+    params.update(extra)
+    return params
+
+
+@pytest.mark.parametrize('extra', [{}, {'timeConstant': 0.05}, {'timeConstant': 0.05, 'samples': 20}])
+def test_float32_within_tolerance_of_float64(extra):
+    # noisy ramp over the calibrated range, the float32 run gets float32 voltages like GUI2 and batch.py load
+    samples = 50_000
+    rng = np.random.default_rng(0)
+    temps = np.linspace(600, 1300, samples) + 273.15
+    voltage = np.exp(SIM_GRADIENT / temps + SIM_INTERCEPT) * 0.9 * (1 + 0.004 * rng.standard_normal(samples))
+    timeData = np.arange(samples) / 1000.0
+    params = rampParams(samples, **extra)
+    exact = process(timeData, voltage, params)[1]
+    single = process(timeData, voltage.astype(np.float32), dict(params, dtype=np.float32))[1]
+    assert single.dtype == np.float32
+    assert np.max(np.abs(single - exact)) <= PRECISION_TOLERANCE
+
+
+def test_precision_change_recomputes_the_conversion():
+    samples = 100
+    timeData = np.arange(samples) / 1000.0
+    voltage = np.full(samples, 1e-3)
+    cache = StageCache()
+    params = rampParams(samples)
+    assert process(timeData, voltage, params, cache)[1].dtype == np.float64
+    assert process(timeData, voltage, dict(params, dtype=np.float32), cache)[1].dtype == np.float32
+
+
+def test_cache_drops_stages_no_longer_used():
+    samples = 1000
+    timeData = np.arange(samples) / 1000.0
+    voltage = np.full(samples, 1e-3)
+    cache = StageCache()
+    params = rampParams(samples, timeConstant=0.05, samples=20)
+    process(timeData, voltage, params, cache)
+    assert set(cache.entries) == {'temperature', 'slice', 'peak', 'average'}
+    # a new window replaces the average, turning peak hold off drops both
+    process(timeData, voltage, dict(params, samples=50), cache)
+    assert set(cache.entries) == {'temperature', 'slice', 'peak', 'average'}
+    assert cache.entries['average'][0][-1] == 50
+    process(timeData, voltage, dict(params, timeConstant=None, samples=None), cache)
+    assert set(cache.entries) == {'temperature', 'slice'}
+    # a new calibration leaves nothing from the old one
+    process(timeData, voltage, dict(params, gradient=params['gradient'] * 1.01, timeConstant=None, samples=None), cache)
+    keys = dict(stageKeys(samples, dict(params, gradient=params['gradient'] * 1.01, timeConstant=None, samples=None)))
+    assert {stage: entry[0] for stage, entry in cache.entries.items()} == keys
@@ -0,0 +1,60 @@
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from captureio import HEADER_BYTES, readCaptureHeader
+from recorder import CaptureRecorder
+from ringbuffer import RingBuffer
+
+
+def record(tmp_path, ring, begin=None, **kwargs):
+    # 1.5 s of samples at 100 Hz, one file per second
+    recorder = CaptureRecorder(ring, str(tmp_path / "run.irc"), 100.0, ["ai0"], blockSeconds=0.1, poll=0.001,
+                               maxSeconds=1.0, **kwargs)
+    recorder.start()
+    if begin:
+        begin()
+    ring.write(np.arange(150, dtype=np.float64))
+    recorder.stop()
+    recorder.join()
+    assert recorder.error is None
+    return [readCaptureHeader(path) for path in recorder.files]
+
+
+def test_headers_start_when_the_acquisition_started(tmp_path):
+    ring = RingBuffer(1000)
+    acquisition = SimpleNamespace(startTime=None)
+
+    def begin():
+        # the device starts after the recorder is made and running
+        acquisition.startTime = 1000.0
+
+    headers = record(tmp_path, ring, begin, acquisition=acquisition)
+    assert [header['startTime'] for header in headers] == [1000.0, 1001.0]
+
+
+def test_headers_without_an_acquisition_count_back_from_the_samples(tmp_path):
+    ring = RingBuffer(1000)
+    before = time.time()
+    headers = record(tmp_path, ring)
+    assert before - 1.5 - 0.5 <= headers[0]['startTime'] <= time.time() - 1.5
+    assert headers[1]['startTime'] == headers[0]['startTime'] + 1.0
+
+
+def test_rotated_files_stay_within_max_bytes(tmp_path):
+    ring = RingBuffer(10_000, dtype=np.float32)
+    maxBytes = HEADER_BYTES + 4 * 1000 + 3 # room for 1000 float32 samples after the header
+    recorder = CaptureRecorder(ring, str(tmp_path / "run.irc"), 1000.0, ["ai0"], blockSeconds=0.5, poll=0.001,
+                               maxBytes=maxBytes)
+    recorder.start()
+    ring.write(np.arange(3500, dtype=np.float32))
+    recorder.stop()
+    recorder.join()
+    assert recorder.error is None
+    sizes = [os.path.getsize(path) for path in recorder.files]
+    assert len(sizes) == 4 and max(sizes) <= maxBytes
+    assert sizes[:3] == [HEADER_BYTES + 4000] * 3
+    stats = recorder.stats()
+    assert stats['bytes'] == 4 * 3500 and stats['throughput'] > 0
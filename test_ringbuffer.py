@@ -0,0 +1,105 @@
+import threading
+
+import numpy as np
+
+from ringbuffer import RingBuffer
+
+
+def feed(ring, total, chunk, start=0):
+    # writes the sample indices start..total-1 themselves, so any sample read can be checked
+    for first in range(start, total, chunk):
+        ring.write(np.arange(first, min(first + chunk, total), dtype=np.float64))
+
+
+def test_wraparound_keeps_the_newest_samples():
+    ring = RingBuffer(10)
+    feed(ring, 27, 4)
+    assert ring.count == 27 and len(ring) == 10
+    np.testing.assert_array_equal(ring.latest(), np.arange(17, 27))
+    # both copies of every slot agree, so any window of the ring is contiguous
+    np.testing.assert_array_equal(ring.buffer[:10], ring.buffer[10:])
+
+
+def test_view_across_the_wrap_is_contiguous_and_zero_copy():
+    ring = RingBuffer(10)
+    feed(ring, 15, 5)
+    view = ring.view(7, 13) # slots 7..9 then 0..2
+    np.testing.assert_array_equal(view, np.arange(7, 13))
+    assert np.shares_memory(view, ring.buffer)
+    start, data = ring.read(7, 13)
+    assert start == 7
+    np.testing.assert_array_equal(data, np.arange(7, 13))
+    assert not np.shares_memory(data, ring.buffer)
+
+
+def test_write_larger_than_capacity():
+    ring = RingBuffer(10)
+    feed(ring, 3, 3)
+    ring.write(np.arange(3, 28, dtype=np.float64))
+    assert ring.count == 28
+    np.testing.assert_array_equal(ring.latest(), np.arange(18, 28))
+    start, data = ring.read(0)
+    assert start == 18
+    np.testing.assert_array_equal(data, np.arange(18, 28))
+
+
+def test_reader_more_than_capacity_behind_reports_the_loss():
+    ring = RingBuffer(10)
+    feed(ring, 8, 4)
+    start, data = ring.read(0)
+    np.testing.assert_array_equal(data, np.arange(8))
+    position = start + len(data)
+    feed(ring, 40, 4, start=8)
+    start, data = ring.read(position)
+    # the samples skipped are reported by start, everything returned is what was written there
+    assert start > position
+    assert ring.count - start <= ring.capacity
+    np.testing.assert_array_equal(data, np.arange(start, start + len(data)))
+    assert start + len(data) == 40
+
+
+def test_read_drops_what_a_write_overwrote_mid_copy():
+    class RacingRing(RingBuffer):
+        # the writer gets in between the reader taking its view and copying it
+        def view(self, start, stop=None):
+            view = super().view(start, stop)
+            if not self.raced:
+                self.raced = True
+                feed(self, self.count + 4, 4, start=self.count)
+            return view
+
+    ring = RacingRing(10)
+    ring.raced = True
+    feed(ring, 10, 4)
+    ring.raced = False
+    start, data = ring.read(0)
+    # samples 0..3 were overwritten by 10..13 while being copied, they must not come back as data
+    assert start >= 4
+    np.testing.assert_array_equal(data, np.arange(start, start + len(data)))
+
+
+def test_concurrent_reader_never_sees_torn_data():
+    ring = RingBuffer(64)
+    total = 200_000
+    writer = threading.Thread(target=feed, args=(ring, total, 7))
+    position = lost = 0
+    writer.start()
+    while writer.is_alive() or position < ring.count:
+        start, data = ring.read(position)
+        np.testing.assert_array_equal(data, np.arange(start, start + len(data)))
+        lost += start - position
+        position = start + len(data)
+    writer.join()
+    assert position == total
+    assert lost <= total
+
+
+def test_channels_move_together():
+    ring = RingBuffer(6, channels=2)
+    for first in range(0, 14, 4):
+        index = np.arange(first, min(first + 4, 14))
+        ring.write(np.vstack((index, -index)))
+    start, data = ring.read(5, 12)
+    assert start == 8 # 5..7 are gone
+    np.testing.assert_array_equal(data, [np.arange(8, 12), -np.arange(8, 12)])
+    np.testing.assert_array_equal(ring.view(9, 13)[1], -np.arange(9, 13))
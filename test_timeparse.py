@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from timeparse import NS_PER_S, TimestampParser
+
+
+def test_minutes_fallback_keeps_the_minutes_clock():
+    parser = TimestampParser()
+    first = parser.parse(np.array(["59:58.0", "59:59.0"], dtype=object))
+    # next chunk doesn't fit the fixed width (no padding, extra digits) and rolls over the hour
+    second = parser.parse(np.array(["59:59.50", "0:00.5", "00:01.0"], dtype=object))
+    np.testing.assert_array_equal(first, [0, NS_PER_S])
+    np.testing.assert_array_equal(second, [1.5 * NS_PER_S, 2.5 * NS_PER_S, 3 * NS_PER_S])
+    assert parser.parse(np.array(["00:02.0"], dtype=object))[0] == 4 * NS_PER_S
+
+
+def test_minutes_fallback_refuses_other_formats():
+    parser = TimestampParser()
+    parser.parse(np.array(["25:39.6"], dtype=object))
+    with pytest.raises(ValueError):
+        parser.parse(np.array(["26/02/2025 16:00:29.362000"], dtype=object))
@@ -0,0 +1,162 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Fast parsing of the DAQ capture Time column.
+# The format is detected once from the first timestamp, then the whole column is parsed as fixed-width
+# ASCII digits straight into int64 nanoseconds. Anything that doesn't fit falls back to pd.to_datetime.
+#   "26/02/2025 16:00:29.362000"  dd/mm/yyyy HH:MM:SS.ffffff (Emissivity and chopper captures)
+#   "25:39.6"                     mm:ss.f (Measurements26Feb), rolls over every hour
+# Numeric time columns (e.g. "Time (s)" saved by the live monitor) are taken as seconds.
+
+DATETIME_PATTERN = re.compile(r'^\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}(\.\d{1,9})?$')
+MINUTES_PATTERN = re.compile(r'^\d{2}:\d{2}(\.\d{1,9})?$')
+LOOSE_MINUTES_PATTERN = r'^\s*(\d{1,2}):(\d{1,2}(?:\.\d*)?)\s*$' # mm:ss.f with any widths, for the fallback
+NS_PER_S = 1_000_000_000
+HOUR_NS = 3600 * NS_PER_S
+
+
+def _asciiMatrix(values, width):
+    # (n, width) uint8 matrix of the strings, or None if any string isn't exactly width ASCII characters
+    try:
+        raw = np.asarray(values, dtype=f'S{width + 1}')
+    except (UnicodeEncodeError, ValueError, TypeError):
+        return None
+    chars = raw.view(np.uint8).reshape(len(raw), width + 1)
+    if chars[:, width].any(): # longer than the detected format
+        return None
+    return chars[:, :width]
+
+
+def _number(chars, start, stop):
+    # integer value of the digit columns start:stop
+    value = np.zeros(len(chars), dtype=np.int64)
+    for col in range(start, stop):
+        value *= 10
+        value += chars[:, col]
+        value -= ord('0')
+    return value
+
+
+def _checkLayout(chars, separators):
+    # separators maps column -> expected character, every other column must be a digit
+    digitCols = [col for col in range(chars.shape[1]) if col not in separators]
+    digits = chars[:, digitCols]
+    if not ((digits >= ord('0')) & (digits <= ord('9'))).all():
+        return False
+    return all((chars[:, col] == ord(sep)).all() for col, sep in separators.items())
+
+
+def _fraction(chars, start, stop):
+    # fractional seconds in ns from the digits after the decimal point
+    if stop <= start:
+        return 0
+    return _number(chars, start, stop) * 10 ** (9 - (stop - start))
+
+
+class TimestampParser:
+    # Parses a Time column, possibly chunk by chunk, into int64 ns offsets from the first timestamp.
+    # The format, the origin and the mm:ss hour rollover carry between calls.
+
+    def __init__(self):
+        self.kind = None # 'datetime', 'minutes', 'seconds' or 'mixed'
+        self.width = None
+        self.origin = None # ns value of the first timestamp
+        self.lastRaw = None # last raw mm:ss value, to spot the hour rolling over
+        self.rollover = 0 # ns added for every hour the mm:ss clock wrapped
+
+    def _detect(self, values):
+        if np.issubdtype(np.asarray(values).dtype, np.number):
+            return 'seconds', None
+        first = str(values[0]).strip()
+        if DATETIME_PATTERN.match(first):
+            return 'datetime', len(first)
+        if MINUTES_PATTERN.match(first):
+            return 'minutes', len(first)
+        return 'mixed', None
+
+    def _parseDatetime(self, chars):
+        separators = {2: '/', 5: '/', 10: ' ', 13: ':', 16: ':'}
+        if self.width > 19:
+            separators[19] = '.'
+        if not _checkLayout(chars, separators):
+            return None
+        day = _number(chars, 0, 2)
+        month = _number(chars, 3, 5)
+        year = _number(chars, 6, 10)
+        days = ((year - 1970) * 12 + month - 1).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+        days += day - 1
+        seconds = days * 86400 + _number(chars, 11, 13) * 3600 + _number(chars, 14, 16) * 60 + _number(chars, 17, 19)
+        return seconds * NS_PER_S + _fraction(chars, 20, self.width)
+
+    def _parseMinutes(self, chars):
+        separators = {2: ':'}
+        if self.width > 5:
+            separators[5] = '.'
+        if not _checkLayout(chars, separators):
+            return None
+        ns = (_number(chars, 0, 2) * 60 + _number(chars, 3, 5)) * NS_PER_S + _fraction(chars, 6, self.width)
+        return self._unwrapHours(ns)
+
+    def _parseMinutesLoose(self, values):
+        # mm:ss.f of any width (a chunk that fails the fixed-width parse), in the same minutes-of-the-hour ns
+        parts = pd.Series(values).astype(str).str.extract(LOOSE_MINUTES_PATTERN)
+        if parts.isna().any(axis=None):
+            bad = values[parts[0].isna().to_numpy()][0]
+            raise ValueError(f"Time column changes format mid-file, {bad!r} isn't mm:ss")
+        seconds = parts[0].astype(np.int64).to_numpy() * 60 + parts[1].astype(np.float64).to_numpy()
+        return self._unwrapHours(np.rint(seconds * NS_PER_S).astype(np.int64))
+
+    def _unwrapHours(self, ns):
+        # unwrap the hour rolling over (59:59.9 -> 00:00.0)
+        previous = np.empty_like(ns)
+        previous[0] = ns[0] if self.lastRaw is None else self.lastRaw
+        previous[1:] = ns[:-1]
+        wraps = np.cumsum(ns - previous < -HOUR_NS // 2)
+        self.lastRaw = int(ns[-1])
+        ns += self.rollover + wraps * HOUR_NS
+        self.rollover += int(wraps[-1]) * HOUR_NS
+        return ns
+
+    def _parseMixed(self, values):
+        # general parser, slow but copes with anything pandas understands
+        parsed = pd.to_datetime(pd.Series(values), format="mixed")
+        return parsed.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+    def parse(self, values):
+        values = np.asarray(values)
+        if len(values) == 0:
+            return np.empty(0, dtype=np.int64)
+        if self.kind is None:
+            self.kind, self.width = self._detect(values)
+
+        ns = None
+        if self.kind == 'seconds':
+            ns = np.rint(values.astype(np.float64) * NS_PER_S).astype(np.int64)
+        elif self.kind in ('datetime', 'minutes'):
+            chars = _asciiMatrix(values, self.width)
+            if chars is not None:
+                ns = self._parseDatetime(chars) if self.kind == 'datetime' else self._parseMinutes(chars)
+            if ns is None and self.kind == 'minutes':
+                # mm:ss is only meaningful against the same clock, the general parser would give datetimes
+                ns = self._parseMinutesLoose(values)
+            elif ns is None and self.origin is None:
+                self.kind = 'mixed' # format changes inside the file, use the general parser from now on
+        if ns is None:
+            ns = self._parseMixed(values)
+
+        if self.origin is None:
+            self.origin = int(ns[0])
+        ns -= self.origin
+        return ns
+
+
+def parseTimestamps(values):
+    # int64 ns offsets of a whole Time column from its first timestamp
+    return TimestampParser().parse(values)
+
+
+def timestampsToSeconds(values):
+    # float seconds from the first timestamp, what (Time - Time[0]).dt.total_seconds() used to give
+    return parseTimestamps(values) / NS_PER_S
@@ -7,33 +7,24 @@ from matplotlib.pyplot import xlabel, ylabel, plot, figure, show, title, legend,
 from numpy import polyfit
 
 from averaging import simpleAvg
-from calibration import findLinParams, findLinGraph
+from calibration import CalibrationSet
 from peakdetect import simplePeakDetect
 import math as math
 
 # output voltage vs temp of ingaas
-rcpT, lnV = findLinGraph('Raw Data/Measurements26Feb/', 900, 1300, 100, 500, True)
-m,c = findLinParams('Raw Data/Measurements26Feb/', 1000, 1300, 100, 500, True)
+cal = CalibrationSet.fromFolder('Raw Data/Measurements26Feb/', 600, 1300, 100, 500) # read once, fit any range
+m,c = cal.fit(1000, 1300)
 dataFile1 = pd.read_csv("Data to Linearize/from .txt (example calibration data).csv")
-V1 = []
-T1 = []
-for a in lnV:
-    V1.append(math.exp(a))
-for a in rcpT:
-    T1.append((1 / a)-273.15)
+points = cal.select(900, 1300)
+V1 = list(cal.voltages[points])
+T1 = list(cal.temps[points])
 
-outT = []
-
-
-for v in V1:
-    outT.append((m/(math.log(v) - c))-273.15) ## from equation T = m/(lnV - c)
+outT = list(cal.predict(m, c, 900, 1300)) ## from equation T = m/(lnV - c)
 figure()
 
-tempDiff = []
-
-for a in range(len(T1)):
-    tempDiff.append(outT[a]-T1[a])
+tempDiff = list(cal.tempErrors(m, c, 900, 1300))
 print(tempDiff)
+cal.report(1000, 1300) # R^2 and leave-one-out errors of the 1000-1300 fit
 
 subplot(2,1,1)
 title("Interface Reading and Furnace Setting Comparison")